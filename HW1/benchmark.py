@@ -0,0 +1,216 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from dgh_cache import load_DGHs
+from synthetic import generate_dataset
+
+ALGORITHMS = ["random", "clustering", "topdown"]
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_KS = [10, 100]
+# Differences below these are treated as noise, whatever the tolerance.
+ABSOLUTE_SLACK = {"wall_time": 0.5, "peak_memory_mb": 16}
+DEFAULT_BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "results", "benchmark-baseline.json"
+)
+
+
+def _peak_memory_mb():
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak_memory / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def _run_anonymizer(algorithm, raw_dataset_file, DGH_folder, k, output_file, pipe):
+    import main
+
+    start_time = time.time()
+    getattr(main, f"{algorithm}_anonymizer")(
+        raw_dataset_file, DGH_folder, k, output_file
+    )
+    wall_time = time.time() - start_time
+
+    pipe.send({"wall_time": wall_time, "peak_memory_mb": _peak_memory_mb()})
+    pipe.close()
+
+
+def measure(algorithm: str, raw_dataset_file: str, DGH_folder: str, k: int) -> dict:
+    """Run one anonymizer in a fresh process, so that its peak memory is its own
+    and not that of earlier runs.
+
+    Returns:
+        dict: the wall time in seconds and the peak resident memory in MiB.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+
+    with tempfile.TemporaryDirectory() as output_folder:
+        process = context.Process(
+            target=_run_anonymizer,
+            args=(
+                algorithm,
+                raw_dataset_file,
+                DGH_folder,
+                k,
+                os.path.join(output_folder, "anonymized.csv"),
+                sender,
+            ),
+        )
+        process.start()
+        sender.close()
+
+        try:
+            result = receiver.recv()
+        except EOFError:
+            result = None
+
+        process.join()
+
+    assert result is not None, f"{algorithm} failed with exit code {process.exitcode}."
+    return result
+
+
+def run_benchmarks(
+    DGH_folder: str,
+    algorithms=ALGORITHMS,
+    sizes=DEFAULT_SIZES,
+    ks=DEFAULT_KS,
+    skew: float = 1.0,
+    seed: int = 0,
+    data_folder=None,
+) -> dict:
+    """Time each anonymizer over every combination of dataset size and k on
+    synthetic datasets, generating each dataset once.
+
+    Returns:
+        dict: measurements keyed by "algorithm/n=size/k=k/skew=skew".
+    """
+    DGHs = load_DGHs(DGH_folder)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        data_folder = data_folder or temporary_folder
+
+        for size in sizes:
+            raw_dataset_file = os.path.join(
+                data_folder, f"synthetic-{size}-{skew}-{seed}.csv"
+            )
+
+            if not os.path.exists(raw_dataset_file):
+                generate_dataset(DGHs, size, raw_dataset_file, skew, seed)
+
+            for algorithm in algorithms:
+                for k in ks:
+                    key = f"{algorithm}/n={size}/k={k}/skew={skew}"
+                    results[key] = measure(algorithm, raw_dataset_file, DGH_folder, k)
+                    print(
+                        f"{key}: {results[key]['wall_time']:.2f}s, "
+                        f"{results[key]['peak_memory_mb']:.0f} MiB",
+                        flush=True,
+                    )
+
+    return results
+
+
+def find_regressions(results: dict, baselines: dict, tolerance: float) -> list:
+    """Compare measurements with stored baselines. A measurement regresses when it
+    exceeds its baseline by more than the tolerance, as a fraction of the
+    baseline, and by more than its ABSOLUTE_SLACK; measurements without a
+    baseline are not compared.
+
+    Returns:
+        list[str]: a description of every regression.
+    """
+    regressions = []
+
+    for key, result in results.items():
+        if key not in baselines:
+            continue
+
+        for measurement, value in result.items():
+            baseline = baselines[key][measurement]
+
+            if value > max(
+                baseline * (1 + tolerance), baseline + ABSOLUTE_SLACK[measurement]
+            ):
+                regressions.append(
+                    f"{key}: {measurement} {value:.2f} > baseline {baseline:.2f}"
+                )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the anonymizers on synthetic datasets and compare "
+        "the results with stored baselines."
+    )
+    parser.add_argument("dgh_path", metavar="DGH-folder")
+    parser.add_argument(
+        "--algorithms", nargs="+", choices=ALGORITHMS, default=ALGORITHMS
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--ks", nargs="+", type=int, default=DEFAULT_KS)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--data-folder", help="keep the generated datasets here to reuse them"
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_FILE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown or memory growth over the baseline, as a fraction",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="add the results to the baseline file instead of comparing them",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.dgh_path,
+        args.algorithms,
+        args.sizes,
+        args.ks,
+        args.skew,
+        args.seed,
+        args.data_folder,
+    )
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines.update(results)
+
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return
+
+    regressions = find_regressions(results, baselines, args.tolerance)
+
+    for regression in regressions:
+        print(f"Regression: {regression}")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
+
+# Sample usage:
+# python3 benchmark.py DGHs/
+# python3 benchmark.py DGHs/ --algorithms random --sizes 1000000 10000000 --ks 100
+# python3 benchmark.py DGHs/ --save-baseline
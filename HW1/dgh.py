@@ -1,12 +1,25 @@
+import numpy as np
+
+
 class DGHNode:
+    __slots__ = (
+        "attribute_name",
+        "value",
+        "level",
+        "parent",
+        "children",
+        "desc_leaf_count",
+        "node_id",
+    )
+
     def __init__(self, attribute_name, value, level, parent):
         self.attribute_name = attribute_name
         self.value = value
         self.level = level
         self.parent = parent
         self.children = []
-        self.ancestors = set()
         self.desc_leaf_count = None
+        self.node_id = None
 
     @property
     def is_leaf(self):
@@ -18,55 +31,146 @@ class DGHNode:
 
 
 class DGHInfo:
-    def __init__(self, root_node):
+    def __init__(self, root_node, compiled_arrays=None):
+        """
+        compiled_arrays, as returned by compiled_arrays(), restores the LCA index
+        and distance table instead of building them again.
+        """
         self.root_node = root_node
 
         self.value_to_level_map = {}
         self.value_to_desc_leaf_counts_map = {}
         self.value_to_node_map = {}
-        self.lca_cache = {}
+        self.value_to_node_id_map = {}
+        self.nodes = []
+
+        self.parents = None
+        self.levels = None
+        self.desc_leaf_counts = None
+        self.pre_order = None
+        self.post_order = None
+        self.lm_costs = None
+
+        self.euler_tour = []
+        self.euler_first_index = []
+        self.euler_first_index_array = None
+        self.euler_sparse_table = []
+
+        self.distance_table = None
 
         self._calc_desc_leaf_counts(root_node)
         self._traverse(root_node)
+        self._build_node_arrays()
+
+        if compiled_arrays is None:
+            self._build_lca_index()
+            self._build_distance_table()
+        else:
+            self._restore_compiled_arrays(compiled_arrays)
 
     @property
     def total_num_leaves(self):
         return self.value_to_desc_leaf_counts_map[self.root_node.value]
 
+    @property
+    def num_nodes(self):
+        return len(self.nodes)
+
     def level_dist_between_values(self, value1, value2):
         return abs(self.value_to_level_map[value1] - self.value_to_level_map[value2])
 
-    def lowest_common_ancestor(self, node_values):
-        if node_values not in self.lca_cache:
-            nodes = [self.value_to_node_map[value] for value in node_values]
-            highest_level = min([node.level for node in nodes])
-            new_nodes = []
+    def node_values(self, node_ids):
+        """
+        Value of a node id, or a NumPy object array of the values of an array of
+        node ids.
+        """
+        if np.ndim(node_ids) == 0:
+            return self.nodes[node_ids].value
 
-            for node in nodes:
-                cur_node = node
+        values = np.array([node.value for node in self.nodes], dtype=object)
+        return values[node_ids]
 
-                while cur_node.level > highest_level:
-                    cur_node = cur_node.parent
+    def leaf_node_ids(self):
+        return np.array([node.node_id for node in self.nodes if node.is_leaf])
 
-                new_nodes.append(cur_node)
+    def lowest_common_ancestor(self, node_values):
+        node_ids = [self.value_to_node_id_map[value] for value in node_values]
+        return self.nodes[self.lowest_common_ancestor_id(node_ids)].value
 
-            new_node_values = [node.value for node in new_nodes]
+    def lowest_common_ancestor_id(self, node_ids):
+        """
+        Same as lowest_common_ancestor, but takes and returns node ids. The LCA of a
+        set of nodes is the LCA of the two nodes first visited earliest and latest
+        in the Euler tour, which is answered with a single sparse table lookup.
+        """
+        if isinstance(node_ids, np.ndarray):
+            euler_indices = self.euler_first_index_array[node_ids]
+            return self._euler_range_min(
+                int(euler_indices.min()), int(euler_indices.max())
+            )
 
-            while len(new_node_values) != new_node_values.count(new_node_values[0]):
-                for idx, new_node in enumerate(new_nodes):
-                    new_nodes[idx] = new_node.parent
-                    new_node_values[idx] = new_nodes[idx].value
+        euler_indices = [self.euler_first_index[node_id] for node_id in node_ids]
+        return self._euler_range_min(min(euler_indices), max(euler_indices))
 
-            self.lca_cache[node_values] = new_node_values[0]
+    def _euler_range_min(self, start, end):
+        """
+        Return the shallowest node in euler_tour[start:end + 1]
+        """
+        row = (end - start + 1).bit_length() - 1
+        node_id1 = self.euler_sparse_table[row][start]
+        node_id2 = self.euler_sparse_table[row][end - (1 << row) + 1]
+
+        if self.nodes[node_id1].level <= self.nodes[node_id2].level:
+            return node_id1
 
-        return self.lca_cache[node_values]
+        return node_id2
 
     def has_ancestor_with_value(self, value_1, value_2):
         """
         Check if a node with value_1 is an ancestor of node with value_2
         """
-        dgh_node_2 = self.value_to_node_map[value_2]
-        return value_1 in dgh_node_2.ancestors
+        return bool(
+            self.has_ancestor_with_id(
+                self.value_to_node_id_map[value_1], self.value_to_node_id_map[value_2]
+            )
+        )
+
+    def has_ancestor_with_id(self, node_id_1, node_id_2):
+        """
+        Same as has_ancestor_with_value, but takes node ids. A node is an ancestor
+        of another when its pre-order/post-order interval contains the other's, so
+        node_id_2 may also be a whole NumPy column, giving a boolean mask.
+        """
+        return (self.pre_order[node_id_1] <= self.pre_order[node_id_2]) & (
+            self.post_order[node_id_2] <= self.post_order[node_id_1]
+        )
+
+    def ancestor_ids_at_level(self, node_ids, level):
+        """
+        Map each node in node_ids (a NumPy array) to its ancestor at the given
+        level. Nodes of one level cover disjoint, ordered pre-order intervals, so the
+        ancestor is the last node of that level starting at or before the node.
+        """
+        level_node_ids = np.flatnonzero(self.levels == level)
+        positions = np.searchsorted(
+            self.pre_order[level_node_ids], self.pre_order[node_ids], side="right"
+        )
+        return level_node_ids[positions - 1]
+
+    def generalize_ids_to_level(self, node_ids, level):
+        """
+        Full-domain generalization of a NumPy array of node ids: nodes deeper than
+        level are replaced by their ancestor at that level.
+        """
+        generalized_ids = node_ids.copy()
+        deeper = self.levels[node_ids] > level
+        generalized_ids[deeper] = self.ancestor_ids_at_level(node_ids[deeper], level)
+
+        return generalized_ids
+
+    @property
+    def height(self):
+        return int(self.levels.max())
 
     def _calc_desc_leaf_counts(self, node):
         if node.is_leaf:
@@ -82,10 +186,191 @@ class DGHInfo:
     def _traverse(self, node):
         value = node.value
 
+        node.node_id = len(self.nodes)
+        self.nodes.append(node)
+
         self.value_to_level_map[value] = node.level
         self.value_to_desc_leaf_counts_map[value] = node.desc_leaf_count
         self.value_to_node_map[value] = node
+        self.value_to_node_id_map[value] = node.node_id
 
         for child in node.children:
-            child.ancestors = set.union(node.ancestors, set([value, child.value]))
             self._traverse(child)
+
+    def _build_node_arrays(self):
+        self.parents = np.array(
+            [-1 if node.is_root else node.parent.node_id for node in self.nodes],
+            dtype=np.int32,
+        )
+        self.levels = np.array([node.level for node in self.nodes], dtype=np.int32)
+        self.desc_leaf_counts = np.array(
+            [node.desc_leaf_count for node in self.nodes], dtype=np.int32
+        )
+        subtree_sizes = np.ones(len(self.nodes), dtype=np.int32)
+
+        for node in reversed(self.nodes):
+            if not node.is_root:
+                subtree_sizes[node.parent.node_id] += subtree_sizes[node.node_id]
+
+        # Node ids are assigned in pre-order, and a node is finished after its
+        # whole subtree but before all of its ancestors.
+        self.pre_order = np.arange(len(self.nodes), dtype=np.int32)
+        self.post_order = self.pre_order - self.levels + subtree_sizes - 1
+
+        self.lm_costs = (self.desc_leaf_counts - 1) / self.total_num_leaves
+
+    def _build_lca_index(self):
+        self.euler_first_index = [0] * len(self.nodes)
+        stack = [(self.root_node, 0)]
+
+        while stack:
+            node, child_idx = stack.pop()
+
+            if child_idx == 0:
+                self.euler_first_index[node.node_id] = len(self.euler_tour)
+
+            self.euler_tour.append(node.node_id)
+
+            if child_idx < len(node.children):
+                stack.append((node, child_idx + 1))
+                stack.append((node.children[child_idx], 0))
+
+        self.euler_first_index_array = np.array(self.euler_first_index, dtype=np.int64)
+
+        row = self.euler_tour
+        self.euler_sparse_table = [row]
+        width = 1
+
+        while 2 * width <= len(self.euler_tour):
+            row = [
+                min(
+                    row[idx],
+                    row[idx + width],
+                    key=lambda node_id: self.nodes[node_id].level,
+                )
+                for idx in range(len(row) - width)
+            ]
+            self.euler_sparse_table.append(row)
+            width *= 2
+
+    def compiled_arrays(self) -> dict:
+        """
+        The NumPy arrays holding the LCA index and distance table, from which
+        DGHInfo(root_node, compiled_arrays) restores them.
+        """
+        return {
+            "parents": self.parents,
+            "euler_tour": np.array(self.euler_tour, dtype=np.int32),
+            "euler_sparse_table": np.concatenate(
+                [np.array(row, dtype=np.int32) for row in self.euler_sparse_table]
+            ),
+            "distance_table": self.distance_table,
+        }
+
+    def _restore_compiled_arrays(self, compiled_arrays):
+        self.euler_tour = compiled_arrays["euler_tour"].tolist()
+        self.euler_first_index = [0] * len(self.nodes)
+
+        for euler_index in reversed(range(len(self.euler_tour))):
+            self.euler_first_index[self.euler_tour[euler_index]] = euler_index
+
+        self.euler_first_index_array = np.array(self.euler_first_index, dtype=np.int64)
+
+        # Row r of the sparse table has one entry fewer than the tour for each of
+        # the 2 ** r - 1 positions its windows cannot start at.
+        flat_sparse_table = compiled_arrays["euler_sparse_table"].tolist()
+        self.euler_sparse_table = []
+        start = 0
+        width = 1
+
+        while start < len(flat_sparse_table):
+            end = start + len(self.euler_tour) - width + 1
+            self.euler_sparse_table.append(flat_sparse_table[start:end])
+            start = end
+            width *= 2
+
+        self.distance_table = compiled_arrays["distance_table"]
+
+    def _build_distance_table(self):
+        """
+        distance_table[id1, id2] is the MD cost of generalizing a pair of nodes to
+        their LCA.
+        """
+        num_nodes = len(self.nodes)
+        lca_levels = np.empty((num_nodes, num_nodes), dtype=np.int32)
+
+        for node_id1 in range(num_nodes):
+            for node_id2 in range(node_id1, num_nodes):
+                lca_level = self.levels[
+                    self.lowest_common_ancestor_id((node_id1, node_id2))
+                ]
+                lca_levels[node_id1, node_id2] = lca_level
+                lca_levels[node_id2, node_id1] = lca_level
+
+        self.distance_table = (
+            self.levels[:, np.newaxis] + self.levels[np.newaxis, :] - 2 * lca_levels
+        )
+
+
+def DGH_from_compiled(attribute_name, values, compiled_arrays):
+    """Rebuild a DGHInfo from the node values, in node id order, and the arrays
+    returned by DGHInfo.compiled_arrays.
+    """
+    nodes = []
+
+    for value, parent_id in zip(values, compiled_arrays["parents"].tolist()):
+        parent = None if parent_id < 0 else nodes[parent_id]
+        node = DGHNode(
+            attribute_name=attribute_name,
+            value=value,
+            level=0 if parent is None else parent.level + 1,
+            parent=parent,
+        )
+
+        if parent is not None:
+            parent.children.append(node)
+
+        nodes.append(node)
+
+    return DGHInfo(nodes[0], compiled_arrays)
+
+
+def read_DGH(DGH_file: str, attribute_name):
+    """Reads one DGH file and returns in desired format.
+
+    Args:
+        DGH_file (str): the path to DGH file.
+    """
+
+    last_node_by_level = []
+
+    with open(DGH_file) as file:
+        for line in file:
+            level = line.rstrip().count("\t")
+            attribute = line.strip()
+
+            if level == 0:
+                cur_node = DGHNode(
+                    attribute_name=attribute_name,
+                    value=attribute,
+                    parent=None,
+                    level=level,
+                )
+            else:
+                parent_node = last_node_by_level[level - 1]
+                cur_node = DGHNode(
+                    attribute_name=attribute_name,
+                    value=attribute,
+                    parent=parent_node,
+                    level=level,
+                )
+                parent_node.children.append(cur_node)
+
+            if level >= len(last_node_by_level):
+                last_node_by_level.append(cur_node)
+
+            last_node_by_level[level] = cur_node
+
+    root_node = last_node_by_level[0]
+
+    return DGHInfo(root_node)
@@ -0,0 +1,183 @@
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import dgh
+import interval_dgh
+from dgh import DGH_from_compiled, read_DGH
+from interval_dgh import IntervalDGHInfo, read_interval_DGH
+
+CACHE_FILE_NAME = ".compiled-DGHs.npz"
+
+# DGH readers by file extension: text trees and numeric interval hierarchies.
+DGH_READERS = {".txt": read_DGH, ".interval": read_interval_DGH}
+
+_registry = {}
+
+
+def _code_version() -> str:
+    """
+    Hash of the modules defining the compiled DGHs, so that a cache written by
+    any other version of them is compiled again.
+    """
+    digest = hashlib.sha256()
+
+    for module_file in (dgh.__file__, interval_dgh.__file__, __file__):
+        with open(module_file, "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+def _DGH_files(DGH_folder: str) -> list:
+    return [
+        DGH_file
+        for extension in DGH_READERS
+        for DGH_file in glob.glob(DGH_folder + "/*" + extension)
+    ]
+
+
+def _source_signatures(DGH_folder: str) -> dict:
+    signatures = {}
+
+    for DGH_file in _DGH_files(DGH_folder):
+        with open(DGH_file, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+
+        signatures[os.path.basename(DGH_file)] = [os.stat(DGH_file).st_mtime_ns, digest]
+
+    return signatures
+
+
+def compile_DGHs(DGH_folder: str) -> dict:
+    """Parse every DGH file in a directory, building the node arrays, leaf
+    counts, LCA index and distance tables of the text DGHs.
+
+    Returns:
+        dict: a dictionary where each key is attribute name and values are DGHInfo.
+    """
+    DGHs = {}
+
+    for DGH_file in _DGH_files(DGH_folder):
+        attribute_name, extension = os.path.splitext(os.path.basename(DGH_file))
+
+        if attribute_name in DGHs:
+            raise ValueError(f"{attribute_name} has more than one DGH file.")
+
+        DGHs[attribute_name] = DGH_READERS[extension](DGH_file, attribute_name)
+
+    return DGHs
+
+
+def _read_compiled_DGHs(cache_file: str, signatures: dict):
+    """
+    The cache is an .npz file of the text DGHs' arrays, with a JSON manifest of
+    the code version, source signatures and per-attribute node values or
+    interval parameters. Any file that cannot be read back is compiled again.
+    """
+    try:
+        with np.load(cache_file, allow_pickle=False) as arrays:
+            manifest = json.loads(str(arrays["manifest"]))
+
+            if (
+                manifest["version"] != _code_version()
+                or manifest["signatures"] != signatures
+            ):
+                return None
+
+            DGHs = {}
+
+            for idx, entry in enumerate(manifest["DGHs"]):
+                attribute_name = entry["attribute"]
+
+                if entry["kind"] == "interval":
+                    DGHs[attribute_name] = IntervalDGHInfo(
+                        attribute_name,
+                        entry["low"],
+                        entry["high"],
+                        entry["bin_widths"],
+                        entry["root_value"],
+                    )
+                else:
+                    compiled_arrays = {
+                        name.split("/", 1)[1]: arrays[name]
+                        for name in arrays.files
+                        if name.startswith(f"{idx}/")
+                    }
+                    DGHs[attribute_name] = DGH_from_compiled(
+                        attribute_name, entry["values"], compiled_arrays
+                    )
+    except Exception:
+        return None
+
+    return DGHs
+
+
+def _write_compiled_DGHs(cache_file: str, signatures: dict, DGHs: dict):
+    manifest = {"version": _code_version(), "signatures": signatures, "DGHs": []}
+    arrays = {}
+
+    for idx, (attribute_name, dgh_info) in enumerate(DGHs.items()):
+        if isinstance(dgh_info, IntervalDGHInfo):
+            manifest["DGHs"].append(
+                {
+                    "attribute": attribute_name,
+                    "kind": "interval",
+                    "low": dgh_info.low,
+                    "high": dgh_info.high,
+                    "bin_widths": dgh_info.widths[1:].tolist(),
+                    "root_value": dgh_info.root_value,
+                }
+            )
+        else:
+            manifest["DGHs"].append(
+                {
+                    "attribute": attribute_name,
+                    "kind": "tree",
+                    "values": [node.value for node in dgh_info.nodes],
+                }
+            )
+
+            for name, array in dgh_info.compiled_arrays().items():
+                arrays[f"{idx}/{name}"] = array
+
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+
+    try:
+        with open(temp_file, "wb") as f:
+            np.savez(f, manifest=np.array(json.dumps(manifest)), **arrays)
+
+        os.replace(temp_file, cache_file)
+    except OSError:
+        # A read-only DGH directory only means the next process compiles again.
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def load_DGHs(DGH_folder: str) -> dict:
+    """Return the compiled DGHs of a directory. They are loaded once per process,
+    from the compiled copy stored in the directory when its recorded modification
+    times and hashes still match the DGH files, and compiled again otherwise.
+
+    Returns:
+        dict: a dictionary where each key is attribute name and values are DGHInfo.
+    """
+    registry_key = os.path.abspath(DGH_folder)
+    signatures = _source_signatures(DGH_folder)
+    entry = _registry.get(registry_key)
+
+    if entry is None or entry[0] != signatures:
+        cache_file = os.path.join(DGH_folder, CACHE_FILE_NAME)
+        DGHs = _read_compiled_DGHs(cache_file, signatures)
+
+        if DGHs is None:
+            DGHs = compile_DGHs(DGH_folder)
+            _write_compiled_DGHs(cache_file, signatures, DGHs)
+
+        entry = (signatures, DGHs)
+        _registry[registry_key] = entry
+
+    return dict(entry[1])
@@ -0,0 +1,244 @@
+import csv
+
+import numpy as np
+
+import profiling
+
+
+class EncodedDataset:
+    """
+    Column-oriented dataset. Every column is a NumPy integer array: quasi-identifier
+    columns hold DGH node ids, other columns hold indices into a per-column vocabulary.
+    """
+
+    def __init__(self, field_names, columns, vocabularies, DGHs):
+        self.field_names = field_names
+        self.columns = columns
+        self.vocabularies = vocabularies
+        self.DGHs = DGHs
+
+    @classmethod
+    def from_rows(cls, field_names, rows, DGHs, qi_only=False):
+        """
+        Encode rows given as sequences of strings. With qi_only, only the
+        quasi-identifier columns are kept; see streaming.apply_generalizations for
+        writing results back together with the other columns.
+        """
+        if qi_only:
+            qi_positions = [
+                position
+                for position, attribute in enumerate(field_names)
+                if attribute in DGHs
+            ]
+            field_names = [field_names[position] for position in qi_positions]
+            rows = ([row[position] for position in qi_positions] for row in rows)
+
+        code_maps = {
+            attribute: DGHs[attribute].value_to_node_id_map if attribute in DGHs else {}
+            for attribute in field_names
+        }
+        raw_columns = {attribute: [] for attribute in field_names}
+
+        for row in rows:
+            for attribute, value in zip(field_names, row):
+                code_map = code_maps[attribute]
+
+                if value not in code_map:
+                    if attribute in DGHs:
+                        raise KeyError(
+                            f"Value {value!r} of {attribute} is not in its DGH."
+                        )
+
+                    code_map[value] = len(code_map)
+
+                raw_columns[attribute].append(code_map[value])
+
+        columns = {
+            attribute: np.array(raw_column, dtype=np.int32)
+            for attribute, raw_column in raw_columns.items()
+        }
+        vocabularies = {
+            attribute: list(code_maps[attribute])
+            for attribute in field_names
+            if attribute not in DGHs
+        }
+
+        return cls(field_names, columns, vocabularies, DGHs)
+
+    @classmethod
+    def from_csv(cls, dataset_file, DGHs, qi_only=False):
+        with open(dataset_file) as f:
+            reader = csv.reader(f)
+            field_names = next(reader)
+            return cls.from_rows(field_names, reader, DGHs, qi_only)
+
+    def __len__(self):
+        return len(self.columns[self.field_names[0]]) if self.field_names else 0
+
+    @property
+    def qi_attributes(self):
+        return [attribute for attribute in self.field_names if attribute in self.DGHs]
+
+    def copy(self):
+        return EncodedDataset(
+            self.field_names,
+            {attribute: column.copy() for attribute, column in self.columns.items()},
+            self.vocabularies,
+            self.DGHs,
+        )
+
+    def take(self, record_indices):
+        return EncodedDataset(
+            self.field_names,
+            {
+                attribute: column[record_indices]
+                for attribute, column in self.columns.items()
+            },
+            self.vocabularies,
+            self.DGHs,
+        )
+
+    def decoded_columns(self):
+        decoded = []
+
+        for attribute in self.field_names:
+            if attribute in self.DGHs:
+                decoded.append(
+                    self.DGHs[attribute].node_values(self.columns[attribute])
+                )
+            else:
+                lookup = np.array(self.vocabularies[attribute], dtype=object)
+                decoded.append(lookup[self.columns[attribute]])
+
+        return decoded
+
+    def rows(self):
+        return zip(*self.decoded_columns())
+
+
+def calculate_encoded_equivalence_class(dataset, record_indices):
+    """
+    Generalize the given records of an encoded dataset in place to the LCA of each
+    quasi-identifier.
+    """
+    for attribute in dataset.qi_attributes:
+        column = dataset.columns[attribute]
+        profiling.count_lca(record_indices)
+        column[record_indices] = dataset.DGHs[attribute].lowest_common_ancestor_id(
+            column[record_indices]
+        )
+
+
+def calc_dists_to_encoded_record(dataset, record_idx, record_indices):
+    """
+    Distances from one record to each of record_indices, gathered from the
+    per-attribute distance tables.
+    """
+    profiling.count("distance_evaluations", len(record_indices))
+    total_MD_costs = np.zeros(len(record_indices), dtype=np.int64)
+
+    for attribute in dataset.qi_attributes:
+        column = dataset.columns[attribute]
+        total_MD_costs += dataset.DGHs[attribute].distance_table[
+            column[record_idx], column[record_indices]
+        ]
+
+    return total_MD_costs
+
+
+def closest_records(distances, record_indices, num_records):
+    """
+    Return the num_records entries of record_indices with the smallest distances,
+    breaking ties by record index. record_indices must be sorted.
+    """
+    if num_records <= 0:
+        return record_indices[:0]
+    if num_records >= len(record_indices):
+        return record_indices
+
+    kth_distance = np.partition(distances, num_records - 1)[num_records - 1]
+    closer = distances < kth_distance
+    tied = np.flatnonzero(distances == kth_distance)[
+        : num_records - np.count_nonzero(closer)
+    ]
+    closer[tied] = True
+
+    return record_indices[closer]
+
+
+def qi_tuple_keys(dataset):
+    """
+    One key per record identifying its quasi-identifier tuple, comparable across
+    datasets encoded with the same DGHs. Keys are mixed-radix int64 values when the
+    tuple space fits, and raw bytes of the tuple otherwise.
+    """
+    qi_attributes = dataset.qi_attributes
+    num_tuples = 1
+
+    for attribute in qi_attributes:
+        num_tuples *= dataset.DGHs[attribute].num_nodes
+
+    if num_tuples <= np.iinfo(np.int64).max:
+        keys = np.zeros(len(dataset), dtype=np.int64)
+
+        for attribute in qi_attributes:
+            keys *= dataset.DGHs[attribute].num_nodes
+            keys += dataset.columns[attribute]
+
+        return keys
+
+    qi_columns = np.ascontiguousarray(
+        np.column_stack(
+            [dataset.columns[attribute].astype(np.int32) for attribute in qi_attributes]
+        )
+    )
+    return qi_columns.view(
+        np.dtype((np.void, qi_columns.itemsize * len(qi_attributes)))
+    ).ravel()
+
+
+def qi_tuple_node_ids(key, qi_attributes, DGHs: dict) -> list:
+    """
+    The quasi-identifier node ids of a key from qi_tuple_keys, given as a Python
+    int or bytes.
+    """
+    if isinstance(key, bytes):
+        return np.frombuffer(key, dtype=np.int32).tolist()
+
+    node_ids = []
+
+    for attribute in reversed(qi_attributes):
+        key, node_id = divmod(key, DGHs[attribute].num_nodes)
+        node_ids.append(node_id)
+
+    return node_ids[::-1]
+
+
+def group_duplicate_records(dataset):
+    """
+    Group the records of an encoded dataset by their quasi-identifier tuple.
+
+    Returns:
+        the index of the first record of each distinct tuple, in row order, the
+        distinct tuple index of every record, and the number of records per tuple.
+    """
+    qi_columns = np.column_stack(
+        [dataset.columns[attribute] for attribute in dataset.qi_attributes]
+    )
+    _, first_record_indices, tuple_indices, tuple_counts = np.unique(
+        qi_columns,
+        axis=0,
+        return_index=True,
+        return_inverse=True,
+        return_counts=True,
+    )
+
+    order = np.argsort(first_record_indices)
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+
+    return (
+        first_record_indices[order],
+        ranks[tuple_indices.reshape(-1)],
+        tuple_counts[order],
+    )
@@ -0,0 +1,144 @@
+import numpy as np
+
+from encoding import qi_tuple_keys
+
+
+def _pack_strides(radixes):
+    strides = [1] * len(radixes)
+
+    for position in range(len(radixes) - 2, -1, -1):
+        strides[position] = strides[position + 1] * radixes[position + 1]
+
+    return strides
+
+
+def _group_keys(keys, counts):
+    unique_keys, key_indices = np.unique(keys, return_inverse=True)
+    grouped_counts = np.bincount(
+        key_indices.reshape(-1), weights=counts, minlength=len(unique_keys)
+    ).astype(np.int64)
+
+    return unique_keys, grouped_counts
+
+
+def frequency_set(raw_dataset):
+    """
+    Distinct quasi-identifier tuples of an encoded dataset with their counts. Tuples
+    are packed into mixed-radix int64 keys, as in encoding.qi_tuple_keys.
+    """
+    keys = qi_tuple_keys(raw_dataset)
+    assert keys.dtype == np.int64, "The quasi-identifier tuple space is too large."
+
+    return _group_keys(keys, np.ones(len(keys), dtype=np.int64))
+
+
+def roll_up(frequency_set, ancestor_table, stride, radix):
+    """
+    Frequency set of the lattice node that generalizes one more attribute,
+    computed from the frequency set of the node just below it instead of from the
+    data. ancestor_table maps each node id of the attribute to its generalized id,
+    and stride and radix locate the attribute's digit in the packed keys.
+    """
+    keys, counts = frequency_set
+    node_ids = keys // stride % radix
+
+    return _group_keys(keys + (ancestor_table[node_ids] - node_ids) * stride, counts)
+
+
+def incognito_search(raw_dataset, k):
+    """
+    Search the lattice of per-attribute DGH levels for the minimal full-domain
+    generalizations that make the dataset k-anonymous. Nodes are visited from the
+    most specific one upwards. A node with a k-anonymous direct specialization is
+    k-anonymous by monotonicity and is neither checked nor minimal; other nodes
+    get their frequency set rolled up from a direct specialization's.
+
+    Returns:
+        list[tuple]: the minimal nodes, as DGH levels in qi_attributes order.
+    """
+    DGHs = raw_dataset.DGHs
+    qi_attributes = raw_dataset.qi_attributes
+    heights = tuple(DGHs[attribute].height for attribute in qi_attributes)
+    radixes = [DGHs[attribute].num_nodes for attribute in qi_attributes]
+    strides = _pack_strides(radixes)
+    ancestor_tables = [
+        [
+            DGHs[attribute].generalize_ids_to_level(np.arange(radix), level)
+            for level in range(height + 1)
+        ]
+        for attribute, radix, height in zip(qi_attributes, radixes, heights)
+    ]
+
+    k_anonymous_nodes = set()
+    minimal_nodes = []
+
+    previous_frequency_sets = {}
+    current_nodes = [heights]
+
+    while current_nodes:
+        frequency_sets = {}
+
+        for node in current_nodes:
+            specializations = [
+                node[:position] + (node[position] + 1,) + node[position + 1 :]
+                for position in range(len(node))
+                if node[position] < heights[position]
+            ]
+
+            if any(
+                specialization in k_anonymous_nodes
+                for specialization in specializations
+            ):
+                k_anonymous_nodes.add(node)
+                continue
+
+            if not specializations:
+                node_frequency_set = frequency_set(raw_dataset)
+            else:
+                specialization = min(
+                    specializations,
+                    key=lambda specialization: len(
+                        previous_frequency_sets[specialization][1]
+                    ),
+                )
+                attribute_position = next(
+                    position
+                    for position in range(len(node))
+                    if node[position] != specialization[position]
+                )
+                node_frequency_set = roll_up(
+                    previous_frequency_sets[specialization],
+                    ancestor_tables[attribute_position][node[attribute_position]],
+                    strides[attribute_position],
+                    radixes[attribute_position],
+                )
+
+            if node_frequency_set[1].min() >= k:
+                k_anonymous_nodes.add(node)
+                minimal_nodes.append(node)
+            else:
+                frequency_sets[node] = node_frequency_set
+
+        previous_frequency_sets = frequency_sets
+        current_nodes = sorted(
+            {
+                node[:position] + (node[position] - 1,) + node[position + 1 :]
+                for node in current_nodes
+                for position in range(len(node))
+                if node[position] > 0
+            },
+            reverse=True,
+        )
+
+    return minimal_nodes
+
+
+def generalize_to_node(dataset, node):
+    """
+    Apply a full-domain generalization, given as DGH levels in qi_attributes
+    order, to the quasi-identifier columns of an encoded dataset in place.
+    """
+    for attribute, level in zip(dataset.qi_attributes, node):
+        dataset.columns[attribute] = dataset.DGHs[attribute].generalize_ids_to_level(
+            dataset.columns[attribute], level
+        )
@@ -0,0 +1,107 @@
+import numpy as np
+
+import profiling
+from encoding import group_duplicate_records
+
+# Upper bound on the number of (class, record) pairs compared at once.
+COVERAGE_BLOCK_SIZE = 1 << 22
+
+
+def release_equivalence_classes(release_dataset):
+    """
+    Equivalence classes of a previous release, as a dataset with one record per
+    distinct quasi-identifier tuple, the class index of every release record and
+    the size of each class.
+    """
+    first_record_indices, class_indices, class_sizes = group_duplicate_records(
+        release_dataset
+    )
+    return release_dataset.take(first_record_indices), class_indices, class_sizes
+
+
+def covering_classes(class_dataset, batch_dataset):
+    """
+    For every batch record, the index of the most specific class whose
+    generalization covers it in every quasi-identifier, in the sense of
+    DGHInfo.has_ancestor_with_value, or -1 when no class does. Ties go to the
+    class with the lowest index.
+    """
+    num_classes = len(class_dataset)
+    class_indices = np.full(len(batch_dataset), -1, dtype=np.int64)
+
+    if num_classes == 0:
+        return class_indices
+
+    class_depths = sum(
+        class_dataset.DGHs[attribute]
+        .levels[class_dataset.columns[attribute]]
+        .astype(np.int64)
+        for attribute in class_dataset.qi_attributes
+    )
+    block_size = max(1, COVERAGE_BLOCK_SIZE // num_classes)
+
+    for start in range(0, len(batch_dataset), block_size):
+        end = min(start + block_size, len(batch_dataset))
+        covers = np.ones((num_classes, end - start), dtype=bool)
+
+        for attribute in class_dataset.qi_attributes:
+            covers &= class_dataset.DGHs[attribute].has_ancestor_with_id(
+                class_dataset.columns[attribute][:, np.newaxis],
+                batch_dataset.columns[attribute][np.newaxis, start:end],
+            )
+
+        depths = np.where(covers, class_depths[:, np.newaxis], -1)
+        best_class_indices = depths.argmax(axis=0)
+        is_covered = covers[best_class_indices, np.arange(end - start)]
+        class_indices[start:end] = np.where(is_covered, best_class_indices, -1)
+
+    return class_indices
+
+
+def widen_closest_class(class_dataset, class_sizes, leftover_dataset):
+    """
+    Pick the class that absorbs the leftover records with the lowest added MD cost
+    once its generalization is widened to cover them.
+
+    Returns:
+        the class index and the widened node id of every quasi-identifier.
+    """
+    best_class_index, best_node_ids, best_cost = None, None, None
+
+    for attribute in class_dataset.qi_attributes:
+        profiling.count_lca(leftover_dataset.columns[attribute])
+
+    leftover_node_ids = {
+        attribute: class_dataset.DGHs[attribute].lowest_common_ancestor_id(
+            leftover_dataset.columns[attribute]
+        )
+        for attribute in class_dataset.qi_attributes
+    }
+
+    for class_index in range(len(class_dataset)):
+        node_ids = {}
+        cost = 0
+
+        for attribute in class_dataset.qi_attributes:
+            dgh_info = class_dataset.DGHs[attribute]
+            class_node_id = int(class_dataset.columns[attribute][class_index])
+            profiling.count_lca((class_node_id, leftover_node_ids[attribute]))
+            node_id = dgh_info.lowest_common_ancestor_id(
+                [class_node_id, leftover_node_ids[attribute]]
+            )
+
+            node_ids[attribute] = node_id
+            cost += int(class_sizes[class_index]) * int(
+                dgh_info.levels[class_node_id] - dgh_info.levels[node_id]
+            )
+            cost += int(
+                (
+                    dgh_info.levels[leftover_dataset.columns[attribute]]
+                    - dgh_info.levels[node_id]
+                ).sum()
+            )
+
+        if best_cost is None or cost < best_cost:
+            best_class_index, best_node_ids, best_cost = class_index, node_ids, cost
+
+    return best_class_index, best_node_ids
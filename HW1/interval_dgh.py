@@ -0,0 +1,396 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from dgh import DGHInfo
+
+
+class IntervalDGHNode:
+    """
+    A node of an IntervalDGHInfo, created on demand with the attributes of a
+    DGHNode.
+    """
+
+    __slots__ = ("dgh_info", "node_id")
+
+    def __init__(self, dgh_info, node_id):
+        self.dgh_info = dgh_info
+        self.node_id = int(node_id)
+
+    @property
+    def attribute_name(self):
+        return self.dgh_info.attribute_name
+
+    @property
+    def value(self):
+        return self.dgh_info.node_values(self.node_id)
+
+    @property
+    def level(self):
+        return int(self.dgh_info.levels[self.node_id])
+
+    @property
+    def desc_leaf_count(self):
+        return int(self.dgh_info.desc_leaf_counts[self.node_id])
+
+    @property
+    def parent(self):
+        parent_id = self.dgh_info.parents[self.node_id]
+        return None if parent_id < 0 else IntervalDGHNode(self.dgh_info, parent_id)
+
+    @property
+    def children(self):
+        return [
+            IntervalDGHNode(self.dgh_info, child_id)
+            for child_id in self.dgh_info.child_ids(self.node_id)
+        ]
+
+    @property
+    def is_leaf(self):
+        return self.level == self.dgh_info.height
+
+    @property
+    def is_root(self):
+        return self.node_id == 0
+
+
+class _NodeColumn:
+    """
+    Read-only per-node array whose entries are computed from the node ids they
+    are indexed with. Converting it to a NumPy array computes every entry.
+    """
+
+    def __init__(self, function, num_nodes):
+        self.function = function
+        self.num_nodes = num_nodes
+
+    def __getitem__(self, node_ids):
+        return self.function(np.asarray(node_ids, dtype=np.int64))[()]
+
+    def __len__(self):
+        return self.num_nodes
+
+    def __array__(self, dtype=None, copy=None):
+        column = self.function(np.arange(self.num_nodes, dtype=np.int64))
+        return column if dtype is None else column.astype(dtype)
+
+
+class _DistanceTable:
+    """
+    Same as DGHInfo.distance_table, computed from the node ids of each pair.
+    """
+
+    def __init__(self, dgh_info):
+        self.dgh_info = dgh_info
+
+    def __getitem__(self, node_id_pairs):
+        node_ids1, node_ids2 = node_id_pairs
+        return self.dgh_info.pair_distances(node_ids1, node_ids2)
+
+
+class _ValueToNodeIdMap(Mapping):
+    """
+    Node id of every node label. A number in the hierarchy's range also maps to
+    the leaf containing it, so raw values need not be leaf labels.
+    """
+
+    def __init__(self, dgh_info):
+        self.dgh_info = dgh_info
+        self.parsed_node_ids = {}
+
+    def __getitem__(self, value):
+        if value not in self.parsed_node_ids:
+            self.parsed_node_ids[value] = self.dgh_info.parse_value(value)
+
+        return self.parsed_node_ids[value]
+
+    def __iter__(self):
+        return iter(self.dgh_info.node_values(np.arange(self.dgh_info.num_nodes)))
+
+    def __len__(self):
+        return self.dgh_info.num_nodes
+
+
+class _ValueToNodeMap(Mapping):
+    """
+    A per-node property looked up by node label, like the value_to_*_map
+    dictionaries of DGHInfo.
+    """
+
+    def __init__(self, dgh_info, function):
+        self.dgh_info = dgh_info
+        self.function = function
+
+    def __getitem__(self, value):
+        return self.function(self.dgh_info.value_to_node_id_map[value])
+
+    def __iter__(self):
+        return iter(self.dgh_info.value_to_node_id_map)
+
+    def __len__(self):
+        return self.dgh_info.num_nodes
+
+
+class IntervalDGHInfo(DGHInfo):
+    """
+    DGH of a numeric attribute whose levels cut the range [low, high) into bins
+    of fixed widths, given from the root's children down to the leaves. Every
+    width divides the one above it, and the range is a whole number of
+    first-level bins. Nothing is stored per node: ids are assigned level by
+    level, left to right, so the level and range of a node, and from them LCAs,
+    ancestor tests and costs, are arithmetic on its id.
+
+    Bins of width 1 are labelled with their number and wider ones as
+    "[start,end)", the way the text DGHs write intervals.
+    """
+
+    def __init__(self, attribute_name, low, high, bin_widths, root_value="Any"):
+        widths = [high - low] + list(bin_widths)
+
+        if not bin_widths or any(
+            width <= 0 or widths[level] % width != 0 or width == widths[level]
+            for level, width in enumerate(bin_widths)
+        ):
+            raise ValueError(
+                f"The bin widths of {attribute_name} must decrease and each must "
+                "divide the width above it and the range."
+            )
+
+        self.attribute_name = attribute_name
+        self.low = low
+        self.high = high
+        self.root_value = root_value
+        self.widths = np.array(widths, dtype=np.int64)
+
+        level_sizes = self.widths[0] // self.widths
+        self.level_offsets = np.concatenate(([0], np.cumsum(level_sizes)[:-1]))
+        self._num_nodes = int(level_sizes.sum())
+        self.subtree_sizes = np.array(
+            [
+                (self.widths[level] // self.widths[level:]).sum()
+                for level in range(len(self.widths))
+            ],
+            dtype=np.int64,
+        )
+
+        self.root_node = IntervalDGHNode(self, 0)
+
+        self.levels = _NodeColumn(self._levels, self._num_nodes)
+        self.parents = _NodeColumn(self._parents, self._num_nodes)
+        self.desc_leaf_counts = _NodeColumn(self._desc_leaf_counts, self._num_nodes)
+        self.pre_order = _NodeColumn(self._pre_order, self._num_nodes)
+        self.post_order = _NodeColumn(self._post_order, self._num_nodes)
+        self.lm_costs = _NodeColumn(self._lm_costs, self._num_nodes)
+        self.distance_table = _DistanceTable(self)
+
+        self.value_to_node_id_map = _ValueToNodeIdMap(self)
+        self.value_to_level_map = _ValueToNodeMap(self, self.levels.__getitem__)
+        self.value_to_desc_leaf_counts_map = _ValueToNodeMap(
+            self, self.desc_leaf_counts.__getitem__
+        )
+        self.value_to_node_map = _ValueToNodeMap(self, self._node)
+
+    @property
+    def total_num_leaves(self):
+        return int(self.widths[0] // self.widths[-1])
+
+    @property
+    def num_nodes(self):
+        return self._num_nodes
+
+    @property
+    def height(self):
+        return len(self.widths) - 1
+
+    def _levels(self, node_ids):
+        return np.searchsorted(self.level_offsets, node_ids, side="right") - 1
+
+    def _starts(self, node_ids, levels):
+        """
+        Offset of each node's range from low.
+        """
+        return (node_ids - self.level_offsets[levels]) * self.widths[levels]
+
+    def _node_ids(self, levels, starts):
+        return self.level_offsets[levels] + starts // self.widths[levels]
+
+    def _parents(self, node_ids):
+        levels = self._levels(node_ids)
+        parent_levels = np.maximum(levels - 1, 0)
+        parent_ids = self._node_ids(parent_levels, self._starts(node_ids, levels))
+        return np.where(levels > 0, parent_ids, -1)
+
+    def _desc_leaf_counts(self, node_ids):
+        return self.widths[self._levels(node_ids)] // self.widths[-1]
+
+    def _pre_order(self, node_ids):
+        levels = self._levels(node_ids)
+        starts = self._starts(node_ids, levels)
+        return levels + sum(starts // width for width in self.widths)
+
+    def _post_order(self, node_ids):
+        # Same relation between pre-order and post-order positions as in DGHInfo.
+        levels = self._levels(node_ids)
+        return self._pre_order(node_ids) - levels + self.subtree_sizes[levels] - 1
+
+    def _lm_costs(self, node_ids):
+        return (self._desc_leaf_counts(node_ids) - 1) / self.total_num_leaves
+
+    def _node(self, node_id):
+        return IntervalDGHNode(self, node_id)
+
+    def child_ids(self, node_id):
+        level = int(self.levels[node_id])
+
+        if level == self.height:
+            return []
+
+        first_child_id = int(
+            self._node_ids(level + 1, self._starts(np.int64(node_id), level))
+        )
+        num_children = int(self.widths[level] // self.widths[level + 1])
+        return list(range(first_child_id, first_child_id + num_children))
+
+    def node_values(self, node_ids):
+        if np.ndim(node_ids) == 0:
+            return self._node_value(int(node_ids))
+
+        unique_node_ids, inverse = np.unique(node_ids, return_inverse=True)
+        values = np.array(
+            [self._node_value(node_id) for node_id in unique_node_ids.tolist()],
+            dtype=object,
+        )
+        return values[inverse.reshape(np.shape(node_ids))]
+
+    def _node_value(self, node_id):
+        level = int(self._levels(node_id))
+
+        if level == 0:
+            return self.root_value
+
+        start = self.low + int(self._starts(node_id, level))
+        width = int(self.widths[level])
+
+        if width == 1:
+            return str(start)
+
+        return f"[{start},{start + width})"
+
+    def leaf_node_ids(self):
+        return np.arange(self.level_offsets[-1], self._num_nodes)
+
+    def parse_value(self, value):
+        """
+        Node id of a node label, or of the leaf containing a number. Raises
+        KeyError for anything else.
+        """
+        if value == self.root_value:
+            return 0
+
+        is_label = str(value).startswith("[") and str(value).endswith(")")
+
+        try:
+            if is_label:
+                start, end = (int(bound) for bound in value[1:-1].split(","))
+                level = self.widths.tolist().index(end - start)
+            else:
+                start = int(value)
+                level = self.height
+        except ValueError:
+            raise KeyError(value) from None
+
+        offset = start - self.low
+
+        if not 0 <= offset < self.widths[0] or (
+            is_label and offset % self.widths[level]
+        ):
+            raise KeyError(value)
+
+        return int(self._node_ids(level, offset))
+
+    def lowest_common_ancestor(self, node_values):
+        node_ids = [self.value_to_node_id_map[value] for value in node_values]
+        return self.node_values(self.lowest_common_ancestor_id(node_ids))
+
+    def lowest_common_ancestor_id(self, node_ids):
+        """
+        The LCA of a set of nodes is the deepest node whose range holds both the
+        smallest start and the largest end among them.
+        """
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        levels = self._levels(node_ids)
+        starts = self._starts(node_ids, levels)
+
+        first_start = int(starts.min())
+        last_end = int((starts + self.widths[levels]).max())
+
+        for level in range(int(levels.min()), -1, -1):
+            width = int(self.widths[level])
+
+            if first_start // width == (last_end - 1) // width:
+                return int(self._node_ids(level, first_start))
+
+    def pair_distances(self, node_ids1, node_ids2):
+        """
+        MD cost of generalizing each pair of nodes to their LCA, with the node ids
+        broadcast against each other.
+        """
+        node_ids1 = np.asarray(node_ids1, dtype=np.int64)
+        node_ids2 = np.asarray(node_ids2, dtype=np.int64)
+        levels1, levels2 = self._levels(node_ids1), self._levels(node_ids2)
+        starts1 = self._starts(node_ids1, levels1)
+        starts2 = self._starts(node_ids2, levels2)
+
+        min_levels = np.minimum(levels1, levels2)
+        lca_levels = np.zeros(np.broadcast(node_ids1, node_ids2).shape, np.int64)
+
+        for level in range(1, len(self.widths)):
+            width = self.widths[level]
+            lca_levels += (level <= min_levels) & (starts1 // width == starts2 // width)
+
+        return levels1 + levels2 - 2 * lca_levels
+
+    def has_ancestor_with_id(self, node_id_1, node_id_2):
+        node_id_1 = np.asarray(node_id_1, dtype=np.int64)
+        node_id_2 = np.asarray(node_id_2, dtype=np.int64)
+        levels1, levels2 = self._levels(node_id_1), self._levels(node_id_2)
+        starts1 = self._starts(node_id_1, levels1)
+        starts2 = self._starts(node_id_2, levels2)
+
+        return (
+            (levels1 <= levels2)
+            & (starts1 <= starts2)
+            & (starts2 < starts1 + self.widths[levels1])
+        )[()]
+
+    def ancestor_ids_at_level(self, node_ids, level):
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        starts = self._starts(node_ids, self._levels(node_ids))
+        return self._node_ids(level, starts // self.widths[level] * self.widths[level])
+
+
+def read_interval_DGH(DGH_file: str, attribute_name):
+    """Reads an interval DGH file, made of lines
+
+        range <low> <high>
+        widths <width> ... <width>
+        root <root value>
+
+    where the root line is optional, and returns an IntervalDGHInfo.
+
+    Args:
+        DGH_file (str): the path to the interval DGH file.
+    """
+    fields = {}
+
+    with open(DGH_file) as file:
+        for line in file:
+            if line.strip() and not line.lstrip().startswith("#"):
+                key, *values = line.split()
+                fields[key] = values
+
+    low, high = (int(bound) for bound in fields["range"])
+    bin_widths = [int(width) for width in fields["widths"]]
+    root_value = " ".join(fields.get("root", ["Any"]))
+
+    return IntervalDGHInfo(attribute_name, low, high, bin_widths, root_value)
@@ -1,19 +1,46 @@
+import argparse
 import csv
-import glob
 import os
 import sys
 import random
-import heapq
 import time
+from concurrent.futures import ProcessPoolExecutor
 
-from dgh import DGHNode, DGHInfo
-from util import calculate_equivalence_class, calc_dist_between_records
-from specialization import SpecializationNode, specialize
-
-if sys.version_info[0] < 3 or sys.version_info[1] < 5:
-    sys.stdout.write("Requires Python 3.x.\n")
+# Checked before the imports below, which need multiprocessing.shared_memory
+# (3.8) and Executor.shutdown(cancel_futures=True) (3.9).
+if sys.version_info < (3, 9):
+    sys.stdout.write("Requires Python 3.9 or later.\n")
     sys.exit(1)
 
+import numpy as np
+
+import profiling
+from dgh import read_DGH  # noqa: F401  (re-exported for callers of main.read_DGH)
+from dgh_cache import load_DGHs
+from encoding import (
+    EncodedDataset,
+    calc_dists_to_encoded_record,
+    calculate_encoded_equivalence_class,
+    closest_records,
+    group_duplicate_records,
+)
+from incognito import generalize_to_node, incognito_search
+from incremental import (
+    covering_classes,
+    release_equivalence_classes,
+    widen_closest_class,
+)
+from metrics import calculate_metrics
+from mondrian import mondrian_partition
+from specialization import SpecializationContext, SpecializationNode, specialize
+from streaming import (
+    DEFAULT_CHUNK_SIZE,
+    apply_generalizations,
+    read_encoded_chunks,
+    write_encoded_chunks,
+)
+from verification import verify_k_anonymity
+
 
 def read_dataset(dataset_file: str):
     """Read a dataset into a list and return.
@@ -51,49 +78,10 @@ def write_dataset(dataset, dataset_file: str) -> bool:
     return True
 
 
-def read_DGH(DGH_file: str, attribute_name):
-    """Reads one DGH file and returns in desired format.
-
-    Args:
-        DGH_file (str): the path to DGH file.
-    """
-
-    last_node_by_level = []
-
-    with open(DGH_file) as file:
-        for line in file:
-            level = line.rstrip().count("\t")
-            attribute = line.strip()
-
-            if level == 0:
-                cur_node = DGHNode(
-                    attribute_name=attribute_name,
-                    value=attribute,
-                    parent=None,
-                    level=level,
-                )
-            else:
-                parent_node = last_node_by_level[level - 1]
-                cur_node = DGHNode(
-                    attribute_name=attribute_name,
-                    value=attribute,
-                    parent=parent_node,
-                    level=level,
-                )
-                parent_node.children.append(cur_node)
-
-            if level >= len(last_node_by_level):
-                last_node_by_level.append(cur_node)
-
-            last_node_by_level[level] = cur_node
-
-    root_node = last_node_by_level[0]
-
-    return DGHInfo(root_node)
-
-
 def read_DGHs(DGH_folder: str) -> dict:
     """Read all DGH files from a directory and put them into a dictionary.
+    DGHs are served from the process-wide registry in dgh_cache, backed by a
+    compiled copy stored in the directory.
 
     Args:
         DGH_folder (str): the path to the directory containing DGH files.
@@ -102,13 +90,7 @@ def read_DGHs(DGH_folder: str) -> dict:
         dict: a dictionary where each key is attribute name and values
             are DGHs in your desired format.
     """
-    DGHs = {}
-
-    for DGH_file in glob.glob(DGH_folder + "/*.txt"):
-        attribute_name = os.path.basename(DGH_file)[:-4]
-        DGHs[attribute_name] = read_DGH(DGH_file, attribute_name)
-
-    return DGHs
+    return load_DGHs(DGH_folder)
 
 
 def cost_MD(
@@ -124,26 +106,10 @@ def cost_MD(
     Returns:
         float: the calculated cost.
     """
-    raw_dataset = read_dataset(raw_dataset_file)
-    anonymized_dataset = read_dataset(anonymized_dataset_file)
-    assert (
-        len(raw_dataset) > 0
-        and len(raw_dataset) == len(anonymized_dataset)
-        and len(raw_dataset[0]) == len(anonymized_dataset[0])
-    )
     DGHs = read_DGHs(DGH_folder)
+    metrics = calculate_metrics(raw_dataset_file, anonymized_dataset_file, DGHs)
 
-    total_MD_cost = 0
-
-    for attribute, dgh_info in DGHs.items():
-        for idx in range(len(raw_dataset)):
-            raw_record, anonymized_record = raw_dataset[idx], anonymized_dataset[idx]
-
-            total_MD_cost += dgh_info.level_dist_between_values(
-                raw_record[attribute], anonymized_record[attribute]
-            )
-
-    return total_MD_cost
+    return metrics.MD_cost
 
 
 def cost_LM(
@@ -159,84 +125,442 @@ def cost_LM(
     Returns:
         float: the calculated cost.
     """
-    raw_dataset = read_dataset(raw_dataset_file)
-    anonymized_dataset = read_dataset(anonymized_dataset_file)
-    assert (
-        len(raw_dataset) > 0
-        and len(raw_dataset) == len(anonymized_dataset)
-        and len(raw_dataset[0]) == len(anonymized_dataset[0])
-    )
     DGHs = read_DGHs(DGH_folder)
+    metrics = calculate_metrics(raw_dataset_file, anonymized_dataset_file, DGHs)
 
-    num_attrubutes = len(DGHs)
-    attribute_weight = 1 / num_attrubutes
+    return metrics.LM_cost
 
-    total_LM_cost = 0
 
-    for attribute, dgh_info in DGHs.items():
-        dgh_total_leaves = dgh_info.total_num_leaves
+def encoded_random_anonymizer(raw_dataset: EncodedDataset, k: int) -> EncodedDataset:
+    """Random k-anonymization of an encoded dataset.
 
-        record_lm_cost = 0
+    Args:
+        raw_dataset (EncodedDataset): the encoded raw dataset.
+        k (int): k-anonymity parameter.
 
-        for record in anonymized_dataset:
-            attribute_val = record[attribute]
-            node_num_desc_leaf = dgh_info.value_to_desc_leaf_counts_map[attribute_val]
-            lm_val = (node_num_desc_leaf - 1) / (dgh_total_leaves)
+    Returns:
+        EncodedDataset: the anonymized dataset.
+    """
+    anonymized_dataset = raw_dataset.copy()
 
-            record_lm_cost += attribute_weight * lm_val
+    dataset_indices = list(range(len(raw_dataset)))
+    random.shuffle(dataset_indices)
 
-        total_LM_cost += record_lm_cost
+    num_pure_clusters = (len(dataset_indices) // k) - 1
+    cluster_ranges = [
+        [cluster_num * k, (cluster_num + 1) * k - 1]
+        for cluster_num in range(num_pure_clusters)
+    ] + [[num_pure_clusters * k, len(dataset_indices) - 1]]
+
+    for cluster_range in cluster_ranges:
+        index_range = dataset_indices[cluster_range[0] : cluster_range[1] + 1]
+        calculate_encoded_equivalence_class(anonymized_dataset, index_range)
 
-    return total_LM_cost
+    return anonymized_dataset
 
 
-def random_anonymizer(raw_dataset_file: str, DGH_folder: str, k: int, output_file: str):
+def random_anonymizer(
+    raw_dataset_file: str,
+    DGH_folder: str,
+    k: int,
+    output_file: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+):
     """K-anonymization a dataset, given a set of DGHs and a k-anonymity param.
+    The dataset is streamed in chunks of chunk_size rows, and random clusters
+    are formed within each chunk.
 
     Args:
         raw_dataset_file (str): the path to the raw dataset file.
         DGH_folder (str): the path to the DGH directory.
         k (int): k-anonymity parameter.
         output_file (str): the path to the output dataset file.
+        chunk_size (int): number of rows held in memory at a time.
     """
-    raw_dataset = read_dataset(raw_dataset_file)
-    DGHs = read_DGHs(DGH_folder)
+    with profiling.phase("load"):
+        DGHs = read_DGHs(DGH_folder)
 
-    anonymized_dataset = [None] * len(raw_dataset)
+    chunks = read_encoded_chunks(
+        raw_dataset_file, DGHs, chunk_size=max(chunk_size, k), min_chunk_size=k
+    )
 
-    dataset_indices = list(range(len(raw_dataset)))
-    random.shuffle(dataset_indices)
+    # Chunks are read, anonymized and written in turn, so this is one phase.
+    with profiling.phase("anonymize"):
+        write_encoded_chunks(
+            (encoded_random_anonymizer(chunk, k) for chunk in chunks), output_file
+        )
 
-    num_pure_clusters = (len(dataset_indices) // k) - 1
-    cluster_ranges = [
-        [cluster_num * k, (cluster_num + 1) * k - 1]
-        for cluster_num in range(num_pure_clusters)
-    ] + [[num_pure_clusters * k, len(dataset_indices) - 1]]
-    index_ranges = [
-        [dataset_indices[idx] for idx in range(cluster_range[0], cluster_range[1] + 1)]
-        for cluster_range in cluster_ranges
-    ]
-    clusters = [
-        [raw_dataset[idx] for idx in index_range] for index_range in index_ranges
+
+def encoded_clustering_anonymizer(
+    raw_dataset: EncodedDataset, k: int
+) -> EncodedDataset:
+    """Clustering-based anonymization of an encoded dataset.
+
+    Args:
+        raw_dataset (EncodedDataset): the encoded raw dataset.
+        k (int): k-anonymity parameter.
+
+    Returns:
+        EncodedDataset: the anonymized dataset.
+    """
+    anonymized_dataset = raw_dataset.copy()
+
+    unmarked_record_indices = np.arange(len(raw_dataset))
+
+    while len(unmarked_record_indices) >= k:
+        cluster_size = k
+
+        if (
+            len(unmarked_record_indices) // k == 1
+            and len(unmarked_record_indices) % k > 0
+        ):
+            cluster_size = len(unmarked_record_indices)
+
+        first_unmarked_index = unmarked_record_indices[0]
+        candidate_indices = unmarked_record_indices[1:]
+
+        distances = calc_dists_to_encoded_record(
+            raw_dataset, first_unmarked_index, candidate_indices
+        )
+        closest_indices = closest_records(
+            distances, candidate_indices, cluster_size - 1
+        )
+        record_indices = np.append(closest_indices, first_unmarked_index)
+
+        calculate_encoded_equivalence_class(anonymized_dataset, record_indices)
+        unmarked_record_indices = candidate_indices[
+            ~np.isin(candidate_indices, closest_indices, assume_unique=True)
+        ]
+
+    return anonymized_dataset
+
+
+def encoded_collapsed_clustering_anonymizer(
+    raw_dataset: EncodedDataset, k: int
+) -> EncodedDataset:
+    """Clustering-based anonymization over the distinct quasi-identifier tuples of
+    an encoded dataset, each weighted by its number of records. A cluster is first
+    filled from the seed tuple's own duplicates at zero distance.
+
+    Args:
+        raw_dataset (EncodedDataset): the encoded raw dataset.
+        k (int): k-anonymity parameter.
+
+    Returns:
+        EncodedDataset: the anonymized dataset.
+    """
+    anonymized_dataset = raw_dataset.copy()
+
+    first_record_indices, tuple_indices, tuple_counts = group_duplicate_records(
+        raw_dataset
+    )
+    distinct_dataset = raw_dataset.take(first_record_indices)
+
+    records_by_tuple = np.argsort(tuple_indices, kind="stable")
+    next_record_offsets = np.cumsum(tuple_counts) - tuple_counts
+    remaining_counts = tuple_counts.copy()
+
+    unmarked_tuple_indices = np.arange(len(distinct_dataset))
+    num_unmarked_records = len(raw_dataset)
+
+    while num_unmarked_records >= k:
+        cluster_size = k
+
+        if num_unmarked_records // k == 1 and num_unmarked_records % k > 0:
+            cluster_size = num_unmarked_records
+
+        seed_tuple_index = unmarked_tuple_indices[0]
+        cluster_entries = [
+            (seed_tuple_index, min(remaining_counts[seed_tuple_index], cluster_size))
+        ]
+        num_needed = cluster_size - cluster_entries[0][1]
+
+        if num_needed > 0:
+            candidate_indices = unmarked_tuple_indices[1:]
+            distances = calc_dists_to_encoded_record(
+                distinct_dataset, seed_tuple_index, candidate_indices
+            )
+
+            # Each tuple contributes at least one record, so the cluster is filled
+            # from at most num_needed of the nearest tuples.
+            nearest_indices = closest_records(distances, candidate_indices, num_needed)
+            nearest_distances = distances[
+                np.searchsorted(candidate_indices, nearest_indices)
+            ]
+
+            for tuple_index in nearest_indices[
+                np.lexsort((nearest_indices, nearest_distances))
+            ]:
+                num_taken = min(remaining_counts[tuple_index], num_needed)
+                cluster_entries.append((tuple_index, num_taken))
+                num_needed -= num_taken
+
+                if num_needed == 0:
+                    break
+
+        record_indices = []
+
+        for tuple_index, num_taken in cluster_entries:
+            offset = next_record_offsets[tuple_index]
+            record_indices.append(records_by_tuple[offset : offset + num_taken])
+
+            next_record_offsets[tuple_index] += num_taken
+            remaining_counts[tuple_index] -= num_taken
+
+        calculate_encoded_equivalence_class(
+            anonymized_dataset, np.concatenate(record_indices)
+        )
+
+        num_unmarked_records -= cluster_size
+        unmarked_tuple_indices = unmarked_tuple_indices[
+            remaining_counts[unmarked_tuple_indices] > 0
+        ]
+
+    return anonymized_dataset
+
+
+def encoded_approximate_clustering_anonymizer(
+    raw_dataset: EncodedDataset, k: int, window: int
+) -> EncodedDataset:
+    """Clustering-based anonymization of an encoded dataset that only compares a
+    seed with records near it. Records are ordered by their concatenated DGH
+    root-to-leaf paths, and a seed's candidates are the window unmarked records
+    on either side of it in that order. The scan is widened only when the window
+    holds fewer than k - 1 candidates. Each cluster then costs O(window)
+    distance evaluations instead of a scan of every unmarked record; a larger
+    window gives a lower MD cost.
+
+    Args:
+        raw_dataset (EncodedDataset): the encoded raw dataset.
+        k (int): k-anonymity parameter.
+        window (int): number of candidates taken on each side of a seed.
+
+    Raises:
+        ValueError: if window is negative.
+
+    Returns:
+        EncodedDataset: the anonymized dataset.
+    """
+    if window < 0:
+        raise ValueError("window must not be negative.")
+
+    anonymized_dataset = raw_dataset.copy()
+    num_records = len(raw_dataset)
+
+    qi_columns = [
+        raw_dataset.columns[attribute] for attribute in raw_dataset.qi_attributes
     ]
+    order = np.lexsort(qi_columns[::-1])
+    positions = np.empty(num_records, dtype=np.int64)
+    positions[order] = np.arange(num_records)
+
+    # Unmarked records as a doubly linked list over their positions in path
+    # order, with -1 past either end.
+    previous_positions = list(range(-1, num_records - 1))
+    next_positions = list(range(1, num_records)) + [-1]
+
+    is_marked = np.zeros(num_records, dtype=bool)
+    num_unmarked_records = num_records
+    seed_index = 0
+
+    while num_unmarked_records >= k:
+        while is_marked[seed_index]:
+            seed_index += 1
+
+        if num_unmarked_records // k == 1 and num_unmarked_records % k > 0:
+            record_indices = np.flatnonzero(~is_marked)
+        else:
+            seed_position = positions[seed_index]
+            candidate_positions = []
+            before, after = (
+                previous_positions[seed_position],
+                next_positions[seed_position],
+            )
+            num_steps = 0
+
+            while (before != -1 or after != -1) and (
+                num_steps < window or len(candidate_positions) < k - 1
+            ):
+                if before != -1:
+                    candidate_positions.append(before)
+                    before = previous_positions[before]
+                if after != -1:
+                    candidate_positions.append(after)
+                    after = next_positions[after]
+
+                num_steps += 1
+
+            candidate_indices = np.sort(order[candidate_positions])
+            distances = calc_dists_to_encoded_record(
+                raw_dataset, seed_index, candidate_indices
+            )
+            closest_indices = closest_records(distances, candidate_indices, k - 1)
+            record_indices = np.append(closest_indices, seed_index)
+
+        calculate_encoded_equivalence_class(anonymized_dataset, record_indices)
+
+        for position in positions[record_indices].tolist():
+            before, after = previous_positions[position], next_positions[position]
+
+            if before != -1:
+                next_positions[before] = after
+            if after != -1:
+                previous_positions[after] = before
+
+        is_marked[record_indices] = True
+        num_unmarked_records -= len(record_indices)
+
+    return anonymized_dataset
+
+
+def partition_records(
+    raw_dataset: EncodedDataset,
+    k: int,
+    num_partitions: int,
+    partition_attribute: str = None,
+) -> list:
+    """Split the records of an encoded dataset into independent partitions for
+    clustering. Without a partition attribute, records are sorted by their DGH
+    paths and cut into num_partitions contiguous runs; otherwise there is one
+    partition per top-level DGH branch of that attribute. Partitions smaller than
+    k are merged together, and into the smallest partition if still too small.
+
+    Raises:
+        ValueError: if partition_attribute is not a quasi-identifier.
+
+    Returns:
+        list[np.ndarray]: sorted record indices of each partition.
+    """
+    if (
+        partition_attribute is not None
+        and partition_attribute not in raw_dataset.qi_attributes
+    ):
+        raise ValueError(f"{partition_attribute!r} is not a quasi-identifier.")
+
+    if partition_attribute is None:
+        qi_columns = [
+            raw_dataset.columns[attribute] for attribute in raw_dataset.qi_attributes
+        ]
+        order = np.lexsort(qi_columns[::-1])
+        partitions = np.array_split(order, num_partitions)
+    else:
+        dgh_info = raw_dataset.DGHs[partition_attribute]
+        branch_ids = dgh_info.ancestor_ids_at_level(
+            raw_dataset.columns[partition_attribute], 1
+        )
+        order = np.argsort(branch_ids, kind="stable")
+        partitions = np.split(order, np.flatnonzero(np.diff(branch_ids[order])) + 1)
+
+    partitions = [np.sort(partition) for partition in partitions if len(partition)]
+    leftovers = [partition for partition in partitions if len(partition) < k]
+    partitions = [partition for partition in partitions if len(partition) >= k]
+
+    if leftovers:
+        leftover = np.sort(np.concatenate(leftovers))
+
+        if len(leftover) >= k or not partitions:
+            partitions.append(leftover)
+        else:
+            smallest_idx = min(
+                range(len(partitions)), key=lambda idx: len(partitions[idx])
+            )
+            partitions[smallest_idx] = np.sort(
+                np.concatenate([partitions[smallest_idx], leftover])
+            )
+
+    return partitions
+
+
+def _cluster_partition(raw_dataset, k, collapse_duplicates, window=None):
+    anonymized_dataset = _select_clustering_anonymizer(
+        raw_dataset, k, collapse_duplicates, 1, None, window
+    )
+
+    return {
+        attribute: anonymized_dataset.columns[attribute]
+        for attribute in anonymized_dataset.qi_attributes
+    }
+
+
+def encoded_parallel_clustering_anonymizer(
+    raw_dataset: EncodedDataset,
+    k: int,
+    num_workers: int,
+    partition_attribute: str = None,
+    collapse_duplicates: bool = False,
+    window: int = None,
+) -> EncodedDataset:
+    """Clustering-based anonymization of an encoded dataset, run independently on
+    each partition from partition_records in a pool of worker processes.
+
+    Args:
+        raw_dataset (EncodedDataset): the encoded raw dataset.
+        k (int): k-anonymity parameter.
+        num_workers (int): number of worker processes.
+        partition_attribute (str): attribute whose top-level DGH branches define
+            the partitions, or None to partition by sorted DGH paths.
+        collapse_duplicates (bool): use the duplicate-collapsing clustering.
+        window (int): use the approximate clustering with this window.
 
-    for cluster_idx in range(len(clusters)):
-        cluster = clusters[cluster_idx]
-        index_range = index_ranges[cluster_idx]
+    Returns:
+        EncodedDataset: the anonymized dataset.
+    """
+    anonymized_dataset = raw_dataset.copy()
+    partitions = partition_records(raw_dataset, k, num_workers, partition_attribute)
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(
+                _cluster_partition,
+                raw_dataset.take(partition),
+                k,
+                collapse_duplicates,
+                window,
+            )
+            for partition in partitions
+        ]
 
-        calculate_equivalence_class(DGHs, cluster)
+        for partition, future in zip(partitions, futures):
+            for attribute, column in future.result().items():
+                anonymized_dataset.columns[attribute][partition] = column
 
-        for idx in range(len(index_range)):
-            record_idx = index_range[idx]
-            record = cluster[idx]
+    return anonymized_dataset
 
-            anonymized_dataset[record_idx] = record
 
-    write_dataset(anonymized_dataset, output_file)
+def _select_clustering_anonymizer(
+    raw_dataset, k, collapse_duplicates, num_workers, partition_attribute, window
+):
+    if collapse_duplicates and window is not None:
+        raise ValueError("collapse_duplicates and window cannot be combined.")
+    if partition_attribute is not None and num_workers <= 1:
+        raise ValueError("partition_attribute requires more than one worker.")
+
+    if num_workers > 1:
+        return encoded_parallel_clustering_anonymizer(
+            raw_dataset,
+            k,
+            num_workers,
+            partition_attribute,
+            collapse_duplicates,
+            window,
+        )
+    if collapse_duplicates:
+        return encoded_collapsed_clustering_anonymizer(raw_dataset, k)
+    if window is not None:
+        return encoded_approximate_clustering_anonymizer(raw_dataset, k, window)
+
+    return encoded_clustering_anonymizer(raw_dataset, k)
 
 
 def clustering_anonymizer(
-    raw_dataset_file: str, DGH_folder: str, k: int, output_file: str
+    raw_dataset_file: str,
+    DGH_folder: str,
+    k: int,
+    output_file: str,
+    collapse_duplicates: bool = False,
+    num_workers: int = 1,
+    partition_attribute: str = None,
+    window: int = None,
 ):
     """Clustering-based anonymization a dataset, given a set of DGHs.
 
@@ -245,58 +569,126 @@ def clustering_anonymizer(
         DGH_folder (str): the path to the DGH directory.
         k (int): k-anonymity parameter.
         output_file (str): the path to the output dataset file.
+        collapse_duplicates (bool): cluster distinct quasi-identifier tuples
+            weighted by their counts instead of individual records.
+        num_workers (int): when above 1, cluster independent partitions of the
+            dataset in that many worker processes.
+        partition_attribute (str): see encoded_parallel_clustering_anonymizer.
+        window (int): when given, only compare each seed with this many records
+            on either side of it; see encoded_approximate_clustering_anonymizer.
     """
-    raw_dataset = read_dataset(raw_dataset_file)
-    DGHs = read_DGHs(DGH_folder)
+    with profiling.phase("load"):
+        DGHs = read_DGHs(DGH_folder)
+        raw_dataset = EncodedDataset.from_csv(raw_dataset_file, DGHs, qi_only=True)
 
-    anonymized_dataset = [None] * len(raw_dataset)
+    with profiling.phase("anonymize"):
+        anonymized_dataset = _select_clustering_anonymizer(
+            raw_dataset,
+            k,
+            collapse_duplicates,
+            num_workers,
+            partition_attribute,
+            window,
+        )
 
-    unmarked_record_indices = set(range(len(raw_dataset)))
-    first_unmarked_index = 0
+    with profiling.phase("write"):
+        apply_generalizations(raw_dataset_file, anonymized_dataset, output_file)
 
-    while len(unmarked_record_indices) >= k:
-        cluster_size = k
-        clustering_heap = []
 
-        if (
-            len(unmarked_record_indices) // k == 1
-            and len(unmarked_record_indices) % k > 0
-        ):
-            cluster_size = len(unmarked_record_indices)
+def encoded_topdown_anonymizer(
+    raw_dataset: EncodedDataset, k: int, num_workers: int = 1
+) -> EncodedDataset:
+    """Top-down anonymization of an encoded dataset.
+
+    Args:
+        raw_dataset (EncodedDataset): the encoded raw dataset.
+        k (int): k-anonymity parameter.
+        num_workers (int): when above 1, score candidate splits in that many
+            worker processes.
+
+    Returns:
+        EncodedDataset: the anonymized dataset.
+    """
+    specialization_tree_leaf_nodes = specialize(
+        [_specialization_tree_root_node(raw_dataset)], k, num_workers
+    )
 
-        rec = raw_dataset[first_unmarked_index]
+    return _generalize_to_specialization_leaves(
+        raw_dataset, specialization_tree_leaf_nodes
+    )
 
-        for record_idx in unmarked_record_indices:
-            if record_idx == first_unmarked_index:
-                continue
 
-            record = raw_dataset[record_idx]
+def encoded_topdown_sweep(
+    raw_dataset: EncodedDataset,
+    ks: list,
+    num_workers: int = 1,
+    reuse_splits: bool = False,
+):
+    """Top-down anonymization of an encoded dataset for several values of k,
+    largest first. Each k is specialized from the root, giving the same result
+    as a separate run.
 
-            heapq.heappush(
-                clustering_heap,
-                [calc_dist_between_records(rec, record, DGHs), record_idx, record],
-            )
+    With reuse_splits, each k instead continues specializing the previous k's
+    leaves, which is valid since a split that is valid for a larger k is also
+    valid for a smaller one. This is faster, but the splits chosen for a larger
+    k are kept, so the result for a smaller k can cost much more than a separate
+    run: on adult-hw1.csv, k=5 after k=10 to 160 has LM 16468 instead of 10184.
 
-        closest_entries = heapq.nsmallest(cluster_size - 1, clustering_heap)
-        entry_cluster = closest_entries + [[-1, first_unmarked_index, rec]]
+    Args:
+        raw_dataset (EncodedDataset): the encoded raw dataset.
+        ks (list[int]): k-anonymity parameters.
+        num_workers (int): see encoded_topdown_anonymizer.
+        reuse_splits (bool): continue from the previous k's leaves.
 
-        record_cluster = [entry[2] for entry in entry_cluster]
-        record_indices = [entry[1] for entry in entry_cluster]
+    Yields:
+        tuple[int, EncodedDataset]: each k with its anonymized dataset.
+    """
+    root_node = _specialization_tree_root_node(raw_dataset)
+    specialization_tree_leaf_nodes = [root_node]
 
-        calculate_equivalence_class(DGHs, record_cluster)
+    for k in sorted(set(ks), reverse=True):
+        if not reuse_splits:
+            specialization_tree_leaf_nodes = [root_node]
+
+        specialization_tree_leaf_nodes = specialize(
+            specialization_tree_leaf_nodes, k, num_workers
+        )
+
+        yield k, _generalize_to_specialization_leaves(
+            raw_dataset, specialization_tree_leaf_nodes
+        )
+
+
+def _specialization_tree_root_node(raw_dataset):
+    DGHs = raw_dataset.DGHs
+    context = SpecializationContext(DGHs, raw_dataset)
+
+    dgh_root_node_attributes_info = [
+        (DGH.root_node.attribute_name, DGH.root_node.value) for DGH in DGHs.values()
+    ]
 
-        for record_idx, record in zip(record_indices, record_cluster):
-            anonymized_dataset[record_idx] = record
-            unmarked_record_indices.remove(record_idx)
+    return SpecializationNode(context, dgh_root_node_attributes_info)
 
-        if unmarked_record_indices:
-            first_unmarked_index = min(unmarked_record_indices)
 
-    write_dataset(anonymized_dataset, output_file)
+def _generalize_to_specialization_leaves(raw_dataset, specialization_leaf_nodes):
+    DGHs = raw_dataset.DGHs
+    anonymized_dataset = raw_dataset.copy()
+
+    for specialization_node in specialization_leaf_nodes:
+        for attribute_name, value in specialization_node.dgh_node_attribute_infos:
+            anonymized_dataset.columns[attribute_name][
+                specialization_node.record_indices
+            ] = DGHs[attribute_name].value_to_node_id_map[value]
+
+    return anonymized_dataset
 
 
 def topdown_anonymizer(
-    raw_dataset_file: str, DGH_folder: str, k: int, output_file: str
+    raw_dataset_file: str,
+    DGH_folder: str,
+    k: int,
+    output_file: str,
+    num_workers: int = 1,
 ):
     """Top-down anonymization a dataset, given a set of DGHs.
 
@@ -305,62 +697,548 @@ def topdown_anonymizer(
         DGH_folder (str): the path to the DGH directory.
         k (int): k-anonymity parameter.
         output_file (str): the path to the output dataset file.
+        num_workers (int): when above 1, score candidate splits in that many
+            worker processes.
     """
-    raw_dataset = read_dataset(raw_dataset_file)
-    anonymized_dataset = [None] * len(raw_dataset)
-    DGHs = read_DGHs(DGH_folder)
+    with profiling.phase("load"):
+        DGHs = read_DGHs(DGH_folder)
+        raw_dataset = EncodedDataset.from_csv(raw_dataset_file, DGHs, qi_only=True)
 
-    SpecializationNode.DGHs = DGHs
-    SpecializationNode.RAW_DATASET = raw_dataset
+    with profiling.phase("anonymize"):
+        anonymized_dataset = encoded_topdown_anonymizer(raw_dataset, k, num_workers)
 
-    dgh_root_node_attributes_info = [
-        (DGH.root_node.attribute_name, DGH.root_node.value) for DGH in DGHs.values()
-    ]
+    with profiling.phase("write"):
+        apply_generalizations(raw_dataset_file, anonymized_dataset, output_file)
 
-    specialization_tree_root_node = SpecializationNode(dgh_root_node_attributes_info)
 
-    specialization_tree_leaf_nodes = specialize(
-        [specialization_tree_root_node], DGHs, k
+def encoded_mondrian_anonymizer(raw_dataset: EncodedDataset, k: int) -> EncodedDataset:
+    """Mondrian anonymization of an encoded dataset: each partition from
+    mondrian_partition is generalized to the LCAs of its values.
+
+    Args:
+        raw_dataset (EncodedDataset): the encoded raw dataset.
+        k (int): k-anonymity parameter.
+
+    Returns:
+        EncodedDataset: the anonymized dataset.
+    """
+    anonymized_dataset = raw_dataset.copy()
+
+    for record_indices in mondrian_partition(raw_dataset, k):
+        calculate_encoded_equivalence_class(anonymized_dataset, record_indices)
+
+    return anonymized_dataset
+
+
+def mondrian_anonymizer(
+    raw_dataset_file: str, DGH_folder: str, k: int, output_file: str
+):
+    """Mondrian multidimensional anonymization a dataset, given a set of DGHs.
+
+    Args:
+        raw_dataset_file (str): the path to the raw dataset file.
+        DGH_folder (str): the path to the DGH directory.
+        k (int): k-anonymity parameter.
+        output_file (str): the path to the output dataset file.
+    """
+    with profiling.phase("load"):
+        DGHs = read_DGHs(DGH_folder)
+        raw_dataset = EncodedDataset.from_csv(raw_dataset_file, DGHs, qi_only=True)
+
+    with profiling.phase("anonymize"):
+        anonymized_dataset = encoded_mondrian_anonymizer(raw_dataset, k)
+
+    with profiling.phase("write"):
+        apply_generalizations(raw_dataset_file, anonymized_dataset, output_file)
+
+
+def encoded_incognito_anonymizer(raw_dataset: EncodedDataset, k: int) -> EncodedDataset:
+    """Full-domain anonymization of an encoded dataset: of the minimal
+    generalizations found by incognito_search, the one with the lowest LM cost
+    is applied.
+
+    Args:
+        raw_dataset (EncodedDataset): the encoded raw dataset.
+        k (int): k-anonymity parameter.
+
+    Returns:
+        EncodedDataset: the anonymized dataset.
+    """
+    best_anonymized_dataset, best_LM_cost = None, None
+
+    for node in incognito_search(raw_dataset, k):
+        anonymized_dataset = raw_dataset.copy()
+        generalize_to_node(anonymized_dataset, node)
+
+        LM_cost = calculate_metrics(
+            raw_dataset, anonymized_dataset, raw_dataset.DGHs
+        ).LM_cost
+
+        if best_LM_cost is None or LM_cost < best_LM_cost:
+            best_anonymized_dataset, best_LM_cost = anonymized_dataset, LM_cost
+
+    assert best_anonymized_dataset is not None, "The dataset has fewer than k rows."
+    return best_anonymized_dataset
+
+
+def incognito_anonymizer(
+    raw_dataset_file: str, DGH_folder: str, k: int, output_file: str
+):
+    """Full-domain generalization lattice search anonymization a dataset, given a
+    set of DGHs.
+
+    Args:
+        raw_dataset_file (str): the path to the raw dataset file.
+        DGH_folder (str): the path to the DGH directory.
+        k (int): k-anonymity parameter.
+        output_file (str): the path to the output dataset file.
+    """
+    with profiling.phase("load"):
+        DGHs = read_DGHs(DGH_folder)
+        raw_dataset = EncodedDataset.from_csv(raw_dataset_file, DGHs, qi_only=True)
+
+    with profiling.phase("anonymize"):
+        anonymized_dataset = encoded_incognito_anonymizer(raw_dataset, k)
+
+    with profiling.phase("write"):
+        apply_generalizations(raw_dataset_file, anonymized_dataset, output_file)
+
+
+def encoded_incremental_anonymizer(
+    release_dataset: EncodedDataset, batch_dataset: EncodedDataset, k: int
+):
+    """Anonymization of a batch of new records against a previous release. A new
+    record joins the most specific release class whose generalization already
+    covers it. The leftovers are clustered among themselves, or, when there are
+    fewer than k of them, absorbed by the release class that is cheapest to widen.
+
+    Args:
+        release_dataset (EncodedDataset): the encoded previous release.
+        batch_dataset (EncodedDataset): the encoded new records.
+        k (int): k-anonymity parameter.
+
+    Returns:
+        tuple[EncodedDataset, EncodedDataset]: the release, with a widened class
+            if one was needed, and the anonymized batch.
+    """
+    assert (
+        release_dataset.qi_attributes == batch_dataset.qi_attributes
+    ), "The release and the batch have different quasi-identifiers."
+
+    class_dataset, class_indices, class_sizes = release_equivalence_classes(
+        release_dataset
     )
+    anonymized_batch = batch_dataset.copy()
 
-    for specialization_node in specialization_tree_leaf_nodes:
-        for record_idx, record in specialization_node.anonymized_records:
-            anonymized_dataset[record_idx] = record
+    assigned_class_indices = covering_classes(class_dataset, batch_dataset)
+    covered_indices = np.flatnonzero(assigned_class_indices >= 0)
+    leftover_indices = np.flatnonzero(assigned_class_indices < 0)
 
-    write_dataset(anonymized_dataset, output_file)
+    for attribute in batch_dataset.qi_attributes:
+        anonymized_batch.columns[attribute][covered_indices] = class_dataset.columns[
+            attribute
+        ][assigned_class_indices[covered_indices]]
 
+    if len(leftover_indices) >= k:
+        clustered_leftovers = encoded_clustering_anonymizer(
+            batch_dataset.take(leftover_indices), k
+        )
 
-if len(sys.argv) < 6:
-    print(
-        f"Usage: python3 {sys.argv[0]} algorithm DGH-folder raw-dataset.csv anonymized.csv k"
+        for attribute in batch_dataset.qi_attributes:
+            anonymized_batch.columns[attribute][leftover_indices] = (
+                clustered_leftovers.columns[attribute]
+            )
+    elif len(leftover_indices) > 0:
+        assert len(class_dataset) > 0, "The batch has fewer than k new records."
+
+        class_index, node_ids = widen_closest_class(
+            class_dataset, class_sizes, batch_dataset.take(leftover_indices)
+        )
+        release_dataset = release_dataset.copy()
+        class_record_indices = np.flatnonzero(class_indices == class_index)
+        widened_batch_indices = np.flatnonzero(
+            (assigned_class_indices == class_index) | (assigned_class_indices < 0)
+        )
+
+        for attribute, node_id in node_ids.items():
+            release_dataset.columns[attribute][class_record_indices] = node_id
+            anonymized_batch.columns[attribute][widened_batch_indices] = node_id
+
+    return release_dataset, anonymized_batch
+
+
+def incremental_anonymizer(
+    raw_dataset_file: str,
+    DGH_folder: str,
+    k: int,
+    output_file: str,
+    previous_release_file: str,
+):
+    """Incremental anonymization of a batch of new records, given the previous
+    release. The output is the updated release: the previous release's rows,
+    followed by the anonymized batch.
+
+    Args:
+        raw_dataset_file (str): the path to the raw file of new records.
+        DGH_folder (str): the path to the DGH directory.
+        k (int): k-anonymity parameter.
+        output_file (str): the path to the output dataset file.
+        previous_release_file (str): the path to the previous release.
+    """
+    if os.path.abspath(output_file) == os.path.abspath(previous_release_file):
+        raise ValueError("The output file must not overwrite the previous release.")
+
+    with profiling.phase("load"):
+        DGHs = read_DGHs(DGH_folder)
+        release_dataset = EncodedDataset.from_csv(
+            previous_release_file, DGHs, qi_only=True
+        )
+        batch_dataset = EncodedDataset.from_csv(raw_dataset_file, DGHs, qi_only=True)
+
+    with profiling.phase("anonymize"):
+        release_dataset, anonymized_batch = encoded_incremental_anonymizer(
+            release_dataset, batch_dataset, k
+        )
+
+    with profiling.phase("write"):
+        apply_generalizations(previous_release_file, release_dataset, output_file)
+        apply_generalizations(
+            raw_dataset_file, anonymized_batch, output_file, append=True
+        )
+
+
+def sweep_output_file(output_file: str, k: int) -> str:
+    root, extension = os.path.splitext(output_file)
+    return f"{root}-k{k}{extension}"
+
+
+def sweep_anonymizer(
+    algorithm: str,
+    raw_dataset_file: str,
+    DGH_folder: str,
+    ks: list,
+    output_file: str,
+    collapse_duplicates: bool = False,
+    num_workers: int = 1,
+    partition_attribute: str = None,
+    window: int = None,
+    reuse_splits: bool = False,
+):
+    """Anonymize a dataset for several values of k, largest first, reading the
+    DGHs and the dataset once. The output for each k goes to output_file with
+    -k<k> before the extension; see sweep_output_file. Random clustering runs on
+    the whole dataset at once instead of in chunks.
+
+    Args:
+        algorithm (str): one of clustering, random, topdown, mondrian and
+            incognito.
+        raw_dataset_file (str): the path to the raw dataset file.
+        DGH_folder (str): the path to the DGH directory.
+        ks (list[int]): k-anonymity parameters.
+        output_file (str): the path pattern of the output dataset files.
+        collapse_duplicates, num_workers, partition_attribute, window: see
+            clustering_anonymizer and topdown_anonymizer.
+        reuse_splits (bool): topdown only; see encoded_topdown_sweep.
+
+    Yields:
+        tuple[int, str, DatasetMetrics, float]: each k with its output file, its
+            metrics and the time spent anonymizing and writing it.
+    """
+    with profiling.phase("load"):
+        DGHs = read_DGHs(DGH_folder)
+        raw_dataset = EncodedDataset.from_csv(raw_dataset_file, DGHs, qi_only=True)
+
+    if algorithm == "topdown":
+        anonymizations = encoded_topdown_sweep(
+            raw_dataset, ks, num_workers, reuse_splits
+        )
+    else:
+        anonymizers = {
+            "clustering": lambda k: _select_clustering_anonymizer(
+                raw_dataset,
+                k,
+                collapse_duplicates,
+                num_workers,
+                partition_attribute,
+                window,
+            ),
+            "random": lambda k: encoded_random_anonymizer(raw_dataset, k),
+            "mondrian": lambda k: encoded_mondrian_anonymizer(raw_dataset, k),
+            "incognito": lambda k: encoded_incognito_anonymizer(raw_dataset, k),
+        }
+        anonymizations = (
+            (k, anonymizers[algorithm](k)) for k in sorted(set(ks), reverse=True)
+        )
+
+    while True:
+        start_time = time.time()
+
+        with profiling.phase("anonymize"):
+            anonymization = next(anonymizations, None)
+
+        if anonymization is None:
+            break
+
+        k, anonymized_dataset = anonymization
+        k_output_file = sweep_output_file(output_file, k)
+
+        with profiling.phase("write"):
+            apply_generalizations(raw_dataset_file, anonymized_dataset, k_output_file)
+
+        elapsed_time = time.time() - start_time
+
+        with profiling.phase("metrics"):
+            metrics = calculate_metrics(raw_dataset, anonymized_dataset, DGHs)
+
+        yield k, k_output_file, metrics, elapsed_time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        usage=f"python3 {sys.argv[0]} algorithm DGH-folder raw-dataset.csv anonymized.csv k [k ...]"
+    )
+    parser.add_argument(
+        "algorithm",
+        choices=[
+            "clustering",
+            "random",
+            "topdown",
+            "mondrian",
+            "incognito",
+            "incremental",
+        ],
+    )
+    parser.add_argument("dgh_path", metavar="DGH-folder")
+    parser.add_argument("raw_file", metavar="raw-dataset.csv")
+    parser.add_argument("anonymized_file", metavar="anonymized.csv")
+    parser.add_argument(
+        "k",
+        type=int,
+        nargs="+",
+        help="with several values, the dataset is loaded once and each k is "
+        "written to anonymized-k<k>.csv",
+    )
+    parser.add_argument(
+        "--collapse-duplicates",
+        action="store_true",
+        help="clustering only: cluster distinct quasi-identifier tuples weighted "
+        "by their counts",
     )
-    print(f"\tWhere algorithm is one of [clustering, random, topdown]")
-    sys.exit(1)
 
-algorithm = sys.argv[1]
-if algorithm not in ["clustering", "random", "topdown"]:
-    print("Invalid algorithm.")
-    sys.exit(2)
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="random only: number of rows held in memory at a time",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="clustering and topdown only: number of worker processes",
+    )
+    parser.add_argument(
+        "--reuse-splits",
+        action="store_true",
+        help="topdown with several values of k only: specialize each k from the "
+        "previous k's leaves instead of from the root; faster, but the smaller "
+        "values of k get a much higher LM cost than separate runs",
+    )
+    parser.add_argument(
+        "--previous-release",
+        help="incremental only, and required by it: the release the new records "
+        "in raw-dataset.csv are appended to",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="check that the output is k-anonymous and report its equivalence "
+        "classes",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print per-phase wall times and hot-path counters; work done in "
+        "worker processes is not counted",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="PROFILE.json",
+        help="also write the --profile summary to this JSON file",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        help="clustering only: compare each seed with this many records on either "
+        "side of it in DGH path order instead of with all records; smaller is "
+        "faster, larger gives a lower MD cost",
+    )
+    parser.add_argument(
+        "--partition-attribute",
+        help="clustering only: partition by the top-level DGH branches of this "
+        "attribute instead of by sorted DGH paths",
+    )
 
-dgh_path = sys.argv[2]
-raw_file = sys.argv[3]
-anonymized_file = sys.argv[4]
-k = int(sys.argv[5])
+    return parser.parse_args()
 
-function = eval(f"{algorithm}_anonymizer")
 
-start_time = time.time()
+def run_anonymizer(function, args, k: int, kwargs: dict):
+    """Run one anonymizer for a single k as parsed by parse_args.
 
-function(raw_file, dgh_path, k, anonymized_file)
+    Returns:
+        tuple[int, str, DatasetMetrics, float]: see sweep_anonymizer.
+    """
+    start_time = time.time()
 
-end_time = time.time()
-elapsed_time = end_time - start_time
+    function(args.raw_file, args.dgh_path, k, args.anonymized_file, **kwargs)
 
-cost_md = cost_MD(raw_file, anonymized_file, dgh_path)
-cost_lm = cost_LM(raw_file, anonymized_file, dgh_path)
-print(
-    f"Results of {k}-anonimity:\n\tCost_MD: {cost_md}\n\tCost_LM: {cost_lm:.2f}\n\tElapsed Time: {elapsed_time:.2f}s\n"
-)
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+
+    with profiling.phase("metrics"):
+        DGHs = read_DGHs(args.dgh_path)
+        anonymized_dataset = args.anonymized_file
+
+        if args.algorithm == "incremental":
+            # Costs are for the new records, which are the last rows of the release.
+            raw_dataset = EncodedDataset.from_csv(args.raw_file, DGHs, qi_only=True)
+            anonymized_dataset = EncodedDataset.from_csv(
+                args.anonymized_file, DGHs, qi_only=True
+            )
+            anonymized_dataset = anonymized_dataset.take(
+                slice(len(anonymized_dataset) - len(raw_dataset), None)
+            )
+
+        metrics = calculate_metrics(args.raw_file, anonymized_dataset, DGHs)
+
+    return k, args.anonymized_file, metrics, elapsed_time
+
+
+def main():
+    args = parse_args()
+    profiling.enabled = args.profile or args.profile_output is not None
+
+    function = eval(f"{args.algorithm}_anonymizer")
+    kwargs = {}
+
+    if args.algorithm == "clustering":
+        kwargs = {
+            "collapse_duplicates": args.collapse_duplicates,
+            "num_workers": args.workers,
+            "partition_attribute": args.partition_attribute,
+            "window": args.window,
+        }
+
+        if args.collapse_duplicates and args.window is not None:
+            print("--collapse-duplicates and --window cannot be combined.")
+            sys.exit(2)
+        if args.window is not None and args.window < 0:
+            print("--window must not be negative.")
+            sys.exit(2)
+        if args.partition_attribute is not None:
+            if args.workers <= 1:
+                print("--partition-attribute requires --workers above 1.")
+                sys.exit(2)
+            if args.partition_attribute not in read_DGHs(args.dgh_path):
+                print(f"--partition-attribute {args.partition_attribute} has no DGH.")
+                sys.exit(2)
+    elif (
+        args.collapse_duplicates
+        or args.partition_attribute is not None
+        or args.window is not None
+    ):
+        print(
+            "--collapse-duplicates, --partition-attribute and --window are only "
+            "supported by clustering."
+        )
+        sys.exit(2)
+    elif args.algorithm == "topdown":
+        kwargs = {"num_workers": args.workers}
+    elif args.workers != 1:
+        print("--workers is only supported by clustering and topdown.")
+        sys.exit(2)
+
+    if args.reuse_splits and (args.algorithm != "topdown" or len(args.k) == 1):
+        print("--reuse-splits is only supported by topdown with several values of k.")
+        sys.exit(2)
+
+    if args.algorithm == "random":
+        kwargs["chunk_size"] = args.chunk_size
+    elif args.chunk_size != DEFAULT_CHUNK_SIZE:
+        print("--chunk-size is only supported by random.")
+        sys.exit(2)
+
+    if args.algorithm == "incremental":
+        if args.previous_release is None:
+            print("incremental requires --previous-release.")
+            sys.exit(2)
+
+        kwargs["previous_release_file"] = args.previous_release
+    elif args.previous_release is not None:
+        print("--previous-release is only supported by incremental.")
+        sys.exit(2)
+
+    if len(args.k) > 1:
+        if args.algorithm == "incremental":
+            print("incremental takes a single k.")
+            sys.exit(2)
+        if args.chunk_size != DEFAULT_CHUNK_SIZE:
+            print("--chunk-size is not supported with several values of k.")
+            sys.exit(2)
+
+        kwargs.pop("chunk_size", None)
+
+        if args.reuse_splits:
+            kwargs["reuse_splits"] = True
+
+        results = sweep_anonymizer(
+            args.algorithm,
+            args.raw_file,
+            args.dgh_path,
+            args.k,
+            args.anonymized_file,
+            **kwargs,
+        )
+    else:
+        results = [run_anonymizer(function, args, args.k[0], kwargs)]
+
+    DGHs = read_DGHs(args.dgh_path)
+    all_k_anonymous = True
+
+    for k, anonymized_file, metrics, elapsed_time in results:
+        cost_md, cost_lm = metrics.MD_cost, metrics.LM_cost
+        print(
+            f"Results of {k}-anonimity:\n\tCost_MD: {cost_md}\n\tCost_LM: {cost_lm:.2f}\n\tElapsed Time: {elapsed_time:.2f}s\n"
+        )
+
+        if args.verify:
+            with profiling.phase("verify"):
+                report = verify_k_anonymity(anonymized_file, DGHs, k)
+
+            print(report.format() + "\n")
+            all_k_anonymous = all_k_anonymous and report.is_k_anonymous
+
+    if args.profile:
+        print(profiling.format_summary() + "\n")
+    if args.profile_output:
+        profiling.dump_summary(args.profile_output)
+
+    if not all_k_anonymous:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
 
 # Sample usage:
 # python3 main.py clustering DGHs/ adult-hw1.csv result.csv 300
+# python3 main.py clustering DGHs/ adult-hw1.csv result.csv 300 --collapse-duplicates
+# python3 main.py clustering DGHs/ adult-hw1.csv result.csv 300 --workers 8
+# python3 main.py clustering DGHs/ adult-hw1.csv result.csv 300 --window 1000
+# python3 main.py mondrian DGHs/ adult-hw1.csv result.csv 300
+# python3 main.py incognito DGHs/ adult-hw1.csv result.csv 300
+# python3 main.py topdown DGHs/ adult-hw1.csv result.csv 300 --verify
+# python3 main.py topdown DGHs/ adult-hw1.csv result.csv 5 10 20 40 80 160
+# python3 main.py topdown DGHs/ adult-hw1.csv result.csv 5 10 20 40 80 160 --reuse-splits
+# python3 main.py topdown DGHs/ adult-hw1.csv result.csv 300 --profile --profile-output profile.json
+# python3 main.py incremental DGHs/ new-rows.csv release-2.csv 300 --previous-release release-1.csv
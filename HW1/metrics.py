@@ -0,0 +1,101 @@
+from collections import Counter
+from itertools import zip_longest
+
+import numpy as np
+
+from encoding import qi_tuple_keys
+from streaming import DEFAULT_CHUNK_SIZE, encoded_chunks
+
+
+class DatasetMetrics:
+    """
+    Costs and equivalence class statistics of an anonymized dataset.
+    """
+
+    def __init__(self, MD_cost, LM_cost, num_records, class_sizes):
+        self.MD_cost = MD_cost
+        self.LM_cost = LM_cost
+        self.num_records = num_records
+        self.class_sizes = class_sizes
+
+    @property
+    def num_equivalence_classes(self):
+        return len(self.class_sizes)
+
+    @property
+    def min_class_size(self):
+        return min(self.class_sizes.values(), default=0)
+
+    @property
+    def mean_class_size(self):
+        if not self.class_sizes:
+            return 0
+
+        return self.num_records / self.num_equivalence_classes
+
+
+def calculate_metrics(
+    raw_dataset, anonymized_dataset, DGHs: dict, chunk_size=DEFAULT_CHUNK_SIZE
+) -> DatasetMetrics:
+    """Calculate MD cost, LM cost and equivalence class sizes in a single pass
+    over both datasets.
+
+    Args:
+        raw_dataset: the raw dataset, as a csv file path or an EncodedDataset.
+        anonymized_dataset: the anonymized dataset, as a csv file path or an
+            EncodedDataset.
+        DGHs (dict): the loaded DGHs.
+        chunk_size (int): number of rows read from each dataset at a time.
+
+    Returns:
+        DatasetMetrics: the calculated metrics.
+    """
+    node_counts = {
+        attribute: np.zeros(dgh_info.num_nodes, dtype=np.int64)
+        for attribute, dgh_info in DGHs.items()
+    }
+    class_sizes = Counter()
+
+    total_MD_cost = 0
+    num_records = 0
+
+    raw_chunks = encoded_chunks(raw_dataset, DGHs, chunk_size, qi_only=True)
+    anonymized_chunks = encoded_chunks(
+        anonymized_dataset, DGHs, chunk_size, qi_only=True
+    )
+
+    for raw_chunk, anonymized_chunk in zip_longest(raw_chunks, anonymized_chunks):
+        assert (
+            raw_chunk is not None
+            and anonymized_chunk is not None
+            and len(raw_chunk) == len(anonymized_chunk)
+        ), "The raw and anonymized datasets have different lengths."
+
+        for attribute, dgh_info in DGHs.items():
+            raw_column = raw_chunk.columns[attribute]
+            anonymized_column = anonymized_chunk.columns[attribute]
+
+            total_MD_cost += int(
+                np.abs(
+                    dgh_info.levels[raw_column].astype(np.int64)
+                    - dgh_info.levels[anonymized_column]
+                ).sum()
+            )
+            node_counts[attribute] += np.bincount(
+                anonymized_column, minlength=dgh_info.num_nodes
+            )
+
+        keys, counts = np.unique(qi_tuple_keys(anonymized_chunk), return_counts=True)
+        class_sizes.update(dict(zip(keys.tolist(), counts.tolist())))
+
+        num_records += len(raw_chunk)
+
+    assert num_records > 0 and sum(class_sizes.values()) == num_records
+
+    attribute_weight = 1 / len(DGHs)
+    total_LM_cost = sum(
+        attribute_weight * float(node_counts[attribute] @ dgh_info.lm_costs)
+        for attribute, dgh_info in DGHs.items()
+    )
+
+    return DatasetMetrics(total_MD_cost, total_LM_cost, num_records, class_sizes)
@@ -0,0 +1,106 @@
+import numpy as np
+
+import profiling
+
+
+def normalized_span(dgh_info, node_ids):
+    """
+    Fraction of the DGH's leaves covered by the LCA of node_ids, from 0 for a
+    single leaf to 1 for the root.
+    """
+    if dgh_info.total_num_leaves <= 1:
+        return 0.0
+
+    profiling.count_lca(node_ids)
+    lca_id = dgh_info.lowest_common_ancestor_id(node_ids)
+    return (dgh_info.desc_leaf_counts[lca_id] - 1) / (dgh_info.total_num_leaves - 1)
+
+
+def dgh_child_cut(dgh_info, node_ids, k):
+    """
+    Split by the child of the values' LCA that each value falls under. Returns one
+    boolean mask per part, or None if a part would have fewer than k records.
+    """
+    profiling.count_lca(node_ids)
+    lca_id = dgh_info.lowest_common_ancestor_id(node_ids)
+    child_ids = dgh_info.ancestor_ids_at_level(node_ids, dgh_info.levels[lca_id] + 1)
+    part_ids, part_counts = np.unique(child_ids, return_counts=True)
+
+    if len(part_ids) < 2 or part_counts.min() < k:
+        return None
+
+    return [child_ids == part_id for part_id in part_ids]
+
+
+def median_cut(dgh_info, node_ids, k):
+    """
+    Split at the median of the values' DGH pre-order positions, so that each part
+    covers a contiguous run of leaves. Returns the two boolean masks, or None if
+    a part would have fewer than k records.
+    """
+    positions = dgh_info.pre_order[node_ids]
+    median_position = np.partition(positions, len(positions) // 2)[len(positions) // 2]
+
+    left_mask = positions < median_position
+    if np.count_nonzero(left_mask) < k:
+        left_mask = positions <= median_position
+
+    num_left = np.count_nonzero(left_mask)
+
+    if num_left < k or len(positions) - num_left < k:
+        return None
+
+    return [left_mask, ~left_mask]
+
+
+def mondrian_partition(raw_dataset, k):
+    """
+    Mondrian multidimensional partitioning of an encoded dataset. A partition is
+    cut on the attribute with the widest normalized DGH span that allows a cut,
+    trying the DGH-child cut before the median cut, until no attribute can be
+    cut without leaving fewer than k records in a part.
+
+    Returns:
+        list[np.ndarray]: record indices of each final partition.
+    """
+    DGHs = raw_dataset.DGHs
+    qi_attributes = raw_dataset.qi_attributes
+
+    worklist = [np.arange(len(raw_dataset))]
+    final_partitions = []
+
+    while worklist:
+        record_indices = worklist.pop()
+        parts = None
+
+        if len(record_indices) >= 2 * k:
+            node_ids_by_attribute = {
+                attribute: raw_dataset.columns[attribute][record_indices]
+                for attribute in qi_attributes
+            }
+            spans = {
+                attribute: normalized_span(DGHs[attribute], node_ids)
+                for attribute, node_ids in node_ids_by_attribute.items()
+            }
+
+            for attribute in sorted(
+                qi_attributes, key=lambda attribute: -spans[attribute]
+            ):
+                if spans[attribute] == 0:
+                    break
+
+                dgh_info = DGHs[attribute]
+                node_ids = node_ids_by_attribute[attribute]
+                parts = dgh_child_cut(dgh_info, node_ids, k) or median_cut(
+                    dgh_info, node_ids, k
+                )
+
+                if parts is not None:
+                    break
+
+        if parts is None:
+            final_partitions.append(record_indices)
+        else:
+            worklist.extend(record_indices[mask] for mask in parts)
+
+    return final_partitions
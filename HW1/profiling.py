@@ -0,0 +1,70 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Event counts and per-phase wall times of the current process. Work done in
+# worker processes is not included. Counting is off unless enabled is set.
+enabled = False
+counters = Counter()
+phase_times = Counter()
+
+
+def count(name: str, amount=1):
+    if enabled:
+        counters[name] += amount
+
+
+def count_lca(node_ids):
+    """
+    Count one LCA query over node_ids. Called by the anonymizers rather than by
+    the DGHs, so that the LCAs of building a distance table are not counted.
+    """
+    if enabled:
+        counters["lca_calls"] += 1
+        counters["lca_nodes"] += len(node_ids)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Add the wall time spent in the with block to the named phase.
+    """
+    start_time = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        phase_times[name] += time.perf_counter() - start_time
+
+
+def reset():
+    counters.clear()
+    phase_times.clear()
+
+
+def summary() -> dict:
+    return {
+        "phase_times": dict(phase_times),
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+def format_summary() -> str:
+    lines = ["Profile:", "\tPhases:"]
+
+    for name, phase_time in phase_times.items():
+        lines.append(f"\t\t{name}: {phase_time:.2f}s")
+
+    lines.append("\tCounters:")
+
+    for name, value in sorted(counters.items()):
+        lines.append(f"\t\t{name}: {value}")
+
+    return "\n".join(lines)
+
+
+def dump_summary(output_file: str):
+    with open(output_file, "w") as f:
+        json.dump(summary(), f, indent=2)
+        f.write("\n")
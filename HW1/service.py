@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import stat
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dgh_cache import load_DGHs
+from encoding import EncodedDataset
+from main import (
+    _select_clustering_anonymizer,
+    encoded_incognito_anonymizer,
+    encoded_incremental_anonymizer,
+    encoded_mondrian_anonymizer,
+    encoded_random_anonymizer,
+    encoded_topdown_anonymizer,
+)
+from metrics import calculate_metrics
+from streaming import apply_generalizations
+
+DEFAULT_SOCKET_FILE = "/tmp/anonymizer.sock"
+# Longest request line accepted; inline batches are sent on a single line.
+MAX_REQUEST_SIZE = 1 << 28
+
+ALGORITHMS = ["clustering", "random", "topdown", "mondrian", "incognito", "incremental"]
+JOB_OPTIONS = {"collapse_duplicates", "window"}
+JOB_PATHS = ["dgh_folder", "input", "output", "previous_release"]
+
+# DGHs of the served folders by absolute path, loaded once per worker process.
+_served_DGHs = {}
+_worker_start_barrier = None
+
+
+def _load_served_DGHs(DGH_folders):
+    for DGH_folder in DGH_folders:
+        _served_DGHs[os.path.abspath(DGH_folder)] = load_DGHs(DGH_folder)
+
+
+def _init_service_worker(DGH_folders, worker_start_barrier):
+    global _worker_start_barrier
+
+    _worker_start_barrier = worker_start_barrier
+    _load_served_DGHs(DGH_folders)
+
+
+def _wait_for_all_workers():
+    _worker_start_barrier.wait()
+
+
+def _encoded_anonymizer(algorithm, raw_dataset, k, options):
+    if algorithm == "clustering":
+        window = options.get("window")
+
+        return _select_clustering_anonymizer(
+            raw_dataset,
+            k,
+            bool(options.get("collapse_duplicates")),
+            1,
+            None,
+            None if window is None else int(window),
+        )
+
+    if options:
+        raise ValueError(f"Options {sorted(options)} only apply to clustering.")
+
+    anonymizers = {
+        "random": encoded_random_anonymizer,
+        "topdown": encoded_topdown_anonymizer,
+        "mondrian": encoded_mondrian_anonymizer,
+        "incognito": encoded_incognito_anonymizer,
+    }
+    return anonymizers[algorithm](raw_dataset, k)
+
+
+def _metrics_summary(metrics) -> dict:
+    return {
+        "MD_cost": metrics.MD_cost,
+        "LM_cost": metrics.LM_cost,
+        "num_records": metrics.num_records,
+        "num_equivalence_classes": metrics.num_equivalence_classes,
+        "min_class_size": metrics.min_class_size,
+        "mean_class_size": metrics.mean_class_size,
+    }
+
+
+def run_job(job: dict) -> dict:
+    """Run one anonymization job in a worker process, with the DGHs loaded when
+    the worker started. The raw records come either from the csv file at
+    job["input"], in which case the anonymized file is written to job["output"],
+    or inline as job["field_names"] and job["rows"], in which case the
+    anonymized rows are returned. Incremental jobs take file paths only, and
+    also job["previous_release"].
+
+    Returns:
+        dict: the metrics of the anonymized records, the time spent anonymizing
+            them and either the output file or the anonymized rows.
+    """
+    algorithm, k = job["algorithm"], int(job["k"])
+    DGHs = _served_DGHs[job["dgh_folder"]]
+    options = job.get("options", {})
+
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}.")
+    if not set(options) <= JOB_OPTIONS:
+        raise ValueError(f"Unknown options {sorted(options)}.")
+    if ("input" in job) == ("rows" in job):
+        raise ValueError("Give either input or rows.")
+
+    start_time = time.time()
+
+    if "rows" in job:
+        if algorithm == "incremental":
+            raise ValueError("incremental takes file paths only.")
+
+        raw_dataset = EncodedDataset.from_rows(job["field_names"], job["rows"], DGHs)
+        anonymized_dataset = _encoded_anonymizer(algorithm, raw_dataset, k, options)
+        result = {"rows": [list(row) for row in anonymized_dataset.rows()]}
+    elif algorithm == "incremental":
+        if os.path.abspath(job["output"]) == os.path.abspath(job["previous_release"]):
+            raise ValueError("The output file must not overwrite the previous release.")
+
+        release_dataset = EncodedDataset.from_csv(
+            job["previous_release"], DGHs, qi_only=True
+        )
+        raw_dataset = EncodedDataset.from_csv(job["input"], DGHs, qi_only=True)
+        release_dataset, anonymized_dataset = encoded_incremental_anonymizer(
+            release_dataset, raw_dataset, k
+        )
+
+        apply_generalizations(job["previous_release"], release_dataset, job["output"])
+        apply_generalizations(
+            job["input"], anonymized_dataset, job["output"], append=True
+        )
+        result = {"output": job["output"]}
+    else:
+        raw_dataset = EncodedDataset.from_csv(job["input"], DGHs, qi_only=True)
+        anonymized_dataset = _encoded_anonymizer(algorithm, raw_dataset, k, options)
+
+        apply_generalizations(job["input"], anonymized_dataset, job["output"])
+        result = {"output": job["output"]}
+
+    result["elapsed_time"] = time.time() - start_time
+    # As in main.py, incremental costs are for the new records only.
+    result["metrics"] = _metrics_summary(
+        calculate_metrics(raw_dataset, anonymized_dataset, DGHs)
+    )
+
+    return result
+
+
+class AnonymizationService:
+    """
+    Serves anonymization jobs over a Unix socket or a localhost TCP port. Each
+    connection sends jobs as JSON objects, one per line, and gets one JSON line
+    back per job, in completion order and tagged with the job's "id". Jobs run on
+    a pool of worker processes that load the served DGH folders once.
+    """
+
+    def __init__(self, DGH_folders, num_workers: int = 1):
+        self.DGH_folders = [os.path.abspath(DGH_folder) for DGH_folder in DGH_folders]
+        # Compiling here first leaves a fresh compiled copy for the workers.
+        _load_served_DGHs(self.DGH_folders)
+
+        worker_start_barrier = multiprocessing.Barrier(num_workers)
+        self.executor = ProcessPoolExecutor(
+            num_workers,
+            initializer=_init_service_worker,
+            initargs=(self.DGH_folders, worker_start_barrier),
+        )
+        # Start every worker before serving: a worker forked during a job would
+        # inherit the open client connections and keep them from closing. Workers
+        # are started on demand, so one task per worker is kept busy until all
+        # of them are running.
+        warm_up_tasks = [
+            self.executor.submit(_wait_for_all_workers) for _ in range(num_workers)
+        ]
+
+        for warm_up_task in warm_up_tasks:
+            warm_up_task.result()
+
+    def _resolve_job(self, job: dict) -> dict:
+        job = dict(job)
+
+        for path in JOB_PATHS:
+            if path in job:
+                job[path] = os.path.abspath(job[path])
+
+        if "dgh_folder" not in job and len(self.DGH_folders) == 1:
+            job["dgh_folder"] = self.DGH_folders[0]
+        if job.get("dgh_folder") not in self.DGH_folders:
+            raise ValueError(f"DGH folder {job.get('dgh_folder')!r} is not served.")
+
+        return job
+
+    async def _handle_job(self, line: bytes, writer, write_lock):
+        job_id = None
+
+        try:
+            job = json.loads(line)
+            job_id = job.get("id")
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, run_job, self._resolve_job(job)
+            )
+            response = {"id": job_id, "ok": True, **result}
+        except Exception as error:
+            response = {
+                "id": job_id,
+                "ok": False,
+                "error": f"{type(error).__name__}: {error}",
+            }
+
+        async with write_lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    async def _handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        try:
+            while True:
+                line = await reader.readline()
+
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(
+                        self._handle_job(line, writer, write_lock)
+                    )
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+            await asyncio.gather(*tasks)
+        except (ConnectionError, ValueError):
+            # A closed connection or an over-long line drops the remaining jobs.
+            for task in tasks:
+                task.cancel()
+        finally:
+            writer.close()
+
+    async def serve(self, socket_file: str = DEFAULT_SOCKET_FILE, port: int = None):
+        """Accept connections until SIGINT or SIGTERM. With a port, listen on
+        localhost instead of the Unix socket file."""
+        if port is None:
+            # Only a stale socket is replaced, never a file at a mistyped path.
+            if os.path.lexists(socket_file):
+                if not stat.S_ISSOCK(os.lstat(socket_file).st_mode):
+                    raise FileExistsError(f"{socket_file} exists and is not a socket.")
+
+                os.remove(socket_file)
+
+            server = await asyncio.start_unix_server(
+                self._handle_connection, socket_file, limit=MAX_REQUEST_SIZE
+            )
+        else:
+            server = await asyncio.start_server(
+                self._handle_connection, "127.0.0.1", port, limit=MAX_REQUEST_SIZE
+            )
+
+        stop = asyncio.Event()
+        for signal_number in [signal.SIGINT, signal.SIGTERM]:
+            asyncio.get_running_loop().add_signal_handler(signal_number, stop.set)
+
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+
+            if port is None and os.path.exists(socket_file):
+                os.remove(socket_file)
+
+
+def submit_jobs(jobs: list, socket_file: str = DEFAULT_SOCKET_FILE, port: int = None):
+    """Send jobs to a running service over one connection and wait for all of
+    them. A job is a dict with "algorithm", "k" and either "input" and "output"
+    or "field_names" and "rows", and optionally "dgh_folder" and "options".
+
+    Returns:
+        list[dict]: the responses, in the order of the jobs.
+    """
+    if port is None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_file)
+    else:
+        connection = socket.create_connection(("127.0.0.1", port))
+
+    with connection, connection.makefile("rwb") as stream:
+        for job_index, job in enumerate(jobs):
+            # Paths are sent absolute, since the service has its own directory.
+            job = {
+                key: os.path.abspath(value) if key in JOB_PATHS else value
+                for key, value in job.items()
+            }
+            stream.write(json.dumps({**job, "id": job_index}).encode() + b"\n")
+
+        stream.flush()
+        connection.shutdown(socket.SHUT_WR)
+
+        responses = [json.loads(line) for line in stream]
+
+    return sorted(responses, key=lambda response: response["id"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve anonymization jobs, keeping the DGHs loaded between them."
+    )
+    parser.add_argument("dgh_paths", metavar="DGH-folder", nargs="+")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_FILE)
+    parser.add_argument(
+        "--port", type=int, help="listen on this localhost port instead of --socket"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="number of worker processes"
+    )
+    args = parser.parse_args()
+
+    service = AnonymizationService(args.dgh_paths, args.workers)
+    asyncio.run(service.serve(args.socket, args.port))
+
+
+if __name__ == "__main__":
+    main()
+
+# Sample usage:
+# python3 service.py DGHs/ --workers 8
+# python3 -c 'import service; print(service.submit_jobs([{"algorithm": "topdown", "k": 300, "input": "adult-hw1.csv", "output": "result.csv"}]))'
@@ -1,26 +1,46 @@
-from util import calculate_LM_cost_of_split
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import profiling
+from encoding import EncodedDataset
+from util import calculate_LM_cost_of_split, calculate_LM_weights
+
+
+class SpecializationContext:
+    """
+    State shared by all nodes of one specialization tree: the DGHs, the encoded raw
+    dataset and the LM weights from calculate_LM_weights.
+    """
+
+    def __init__(self, DGHs, raw_dataset):
+        self.DGHs = DGHs
+        self.raw_dataset = raw_dataset
+        self.LM_weights = calculate_LM_weights(DGHs)
 
 
 class SpecializationNode:
-    DGHs = None
-    RAW_DATASET = None
+    def __init__(
+        self, context, dgh_node_attribute_infos, parent=None, record_indices=None
+    ):
+        profiling.count("specialization_nodes")
 
-    def __init__(self, dgh_node_attribute_infos, parent=None):
+        self.context = context
         self.dgh_node_attribute_infos = dgh_node_attribute_infos
         self.parent = parent
-        self.raw_records = None
-        self.anonymized_records = None
+        self.record_indices = record_indices
 
-        if not parent:
-            self.raw_records, self.anonymized_records = self.calculate_records(
-                enumerate(self.RAW_DATASET)
-            )
-        else:
-            self.raw_records, self.anonymized_records = self.calculate_records(
-                self.parent.raw_records
-            )
+        if record_indices is None:
+            if not parent:
+                self.record_indices = self.calculate_records(
+                    np.arange(len(self.context.raw_dataset))
+                )
+            else:
+                self.record_indices = self.calculate_records(self.parent.record_indices)
 
-        self.num_records = len(self.raw_records)
+        self.num_records = len(self.record_indices)
         self.LM_cost = self.calc_LM_cost()
 
         self.attribute_name_to_idx_map = {
@@ -28,122 +48,241 @@ class SpecializationNode:
             for idx, attribute_info in enumerate(self.dgh_node_attribute_infos)
         }
 
-    def __eq__(self, other):
-        for (_, value1), (_, value2) in zip(
-            self.dgh_node_attribute_infos, other.dgh_node_attribute_infos
-        ):
-            if value1 != value2:
-                return False
+    def calculate_records(self, record_indices):
+        profiling.count("specialization_records_scanned", len(record_indices))
+        columns = self.context.raw_dataset.columns
+        matches = np.ones(len(record_indices), dtype=bool)
 
-        return True
+        for attribute_name, value in self.dgh_node_attribute_infos:
+            dgh_info = self.context.DGHs[attribute_name]
+            matches &= dgh_info.has_ancestor_with_id(
+                dgh_info.value_to_node_id_map[value],
+                columns[attribute_name][record_indices],
+            )
+
+        return record_indices[matches]
+
+    def split(self, attribute_name):
+        """
+        Specialize the attribute to the children of its current DGH node. Each
+        record goes to the child bucket containing its raw value in one pass over
+        this node's records.
+        """
+        dgh_info = self.context.DGHs[attribute_name]
+        attribute_idx = self.attribute_name_to_idx_map[attribute_name]
+        dgh_node = dgh_info.value_to_node_map[
+            self.dgh_node_attribute_infos[attribute_idx][1]
+        ]
+
+        if dgh_node.is_leaf:
+            return []
+
+        profiling.count("specialization_records_scanned", self.num_records)
+        child_node_ids = np.array([child.node_id for child in dgh_node.children])
+        child_ids = dgh_info.ancestor_ids_at_level(
+            self.context.raw_dataset.columns[attribute_name][self.record_indices],
+            dgh_node.level + 1,
+        )
+        child_positions = np.searchsorted(child_node_ids, child_ids)
 
-    def calculate_records(self, data):
-        raw_records, specialized_records = [], []
+        order = np.argsort(child_positions, kind="stable")
+        child_record_counts = np.bincount(
+            child_positions, minlength=len(child_node_ids)
+        )
+        child_record_indices = np.split(
+            self.record_indices[order], np.cumsum(child_record_counts)[:-1]
+        )
 
-        for record_idx, record in data:
-            num_matches = 0
+        children = []
 
-            for attribute_name, value in self.dgh_node_attribute_infos:
-                dgh_info = self.DGHs[attribute_name]
-                num_matches += int(
-                    dgh_info.has_ancestor_with_value(value, record[attribute_name])
+        for child_dgh_node, record_indices in zip(
+            dgh_node.children, child_record_indices
+        ):
+            new_dgh_node_attribute_infos = self.dgh_node_attribute_infos[:]
+            new_dgh_node_attribute_infos[attribute_idx] = (
+                attribute_name,
+                child_dgh_node.value,
+            )
+            children.append(
+                SpecializationNode(
+                    self.context,
+                    new_dgh_node_attribute_infos,
+                    parent=self,
+                    record_indices=record_indices,
                 )
+            )
 
-            if num_matches == len(self.dgh_node_attribute_infos):
-                new_record = dict(record)
+        return children
 
-                for attribute_name, value in self.dgh_node_attribute_infos:
-                    new_record[attribute_name] = value
+    def calc_LM_cost(self):
+        """
+        Every record of the node has the same generalized values, so the cost is
+        the number of records times the node's per-record cost. It is kept as an
+        exact fraction so that equal-cost splits compare as ties instead of being
+        decided by rounding error.
+        """
+        weight_multipliers, denominator = self.context.LM_weights
+        DGHs = self.context.DGHs
+
+        record_LM_numerator = sum(
+            (int(DGHs[attribute].value_to_desc_leaf_counts_map[value]) - 1)
+            * weight_multipliers[attribute]
+            for attribute, value in self.dgh_node_attribute_infos
+        )
 
-                raw_records.append((record_idx, record))
-                specialized_records.append((record_idx, new_record))
+        return Fraction(self.num_records * record_LM_numerator, denominator)
 
-        return raw_records, specialized_records
 
-    def calc_LM_cost(self):
-        num_attrubutes = len(self.DGHs)
-        attribute_weight = 1 / num_attrubutes
+def find_best_split(specialization_node, k):
+    """
+    Return the children of the valid split with the largest LM cost reduction, or
+    None if no split leaves every child with at least k records.
+    """
+    valid_splits = []
+    split_cost_diffs = []
 
-        total_LM_cost = 0
+    for attribute_name, _ in specialization_node.dgh_node_attribute_infos:
+        new_specialization_nodes = specialization_node.split(attribute_name)
 
-        for attribute, dgh_info in self.DGHs.items():
-            dgh_total_leaves = dgh_info.total_num_leaves
+        if new_specialization_nodes and all(
+            [node.num_records >= k for node in new_specialization_nodes]
+        ):
+            valid_splits.append(new_specialization_nodes)
+            split_cost_diffs.append(
+                specialization_node.LM_cost
+                - calculate_LM_cost_of_split(new_specialization_nodes)
+            )
 
-            record_lm_cost = 0
+    if not valid_splits:
+        return None
 
-            for _, record in self.anonymized_records:
-                attribute_val = record[attribute]
-                node_num_desc_leaf = dgh_info.value_to_desc_leaf_counts_map[
-                    attribute_val
-                ]
-                lm_val = (node_num_desc_leaf - 1) / (dgh_total_leaves)
+    best_split_index = max(
+        range(len(split_cost_diffs)), key=lambda idx: split_cost_diffs[idx]
+    )
+    return valid_splits[best_split_index]
 
-                record_lm_cost += attribute_weight * lm_val
 
-            total_LM_cost += record_lm_cost
+_worker_context = None
 
-        return total_LM_cost
 
+def _init_specialization_worker(DGHs, qi_attributes, shared_memory_name, shape):
+    global _worker_context
 
-def specialize(specialization_leaf_nodes, DGHs, k):
-    new_specialization_tree_leaf_nodes = []
+    shared_memory = SharedMemory(name=shared_memory_name)
+    qi_columns = np.ndarray(shape, dtype=np.int32, buffer=shared_memory.buf)
+    raw_dataset = EncodedDataset(
+        qi_attributes, dict(zip(qi_attributes, qi_columns)), {}, DGHs
+    )
 
-    for specialization_node in specialization_leaf_nodes:
-        valid_splits = []
-        split_cost_diffs = []
+    _worker_context = SpecializationContext(DGHs, raw_dataset)
+    # Keep the mapping open for as long as the columns are in use.
+    _worker_context.shared_memory = shared_memory
 
-        for attribute_name, value in specialization_node.dgh_node_attribute_infos:
-            new_specialization_nodes = []
-            new_dgh_node_attribute_infos = specialization_node.dgh_node_attribute_infos[
-                :
-            ]
 
-            dgh_info = DGHs[attribute_name]
-            dgh_node = dgh_info.value_to_node_map[value]
-            attribute_idx = specialization_node.attribute_name_to_idx_map[
-                attribute_name
-            ]
+def _find_best_split_in_worker(task):
+    dgh_node_attribute_infos, record_indices, k = task
+    specialization_node = SpecializationNode(
+        _worker_context, dgh_node_attribute_infos, record_indices=record_indices
+    )
+    best_split = find_best_split(specialization_node, k)
 
-            for child_dgh_node in dgh_node.children:
-                new_dgh_node_attribute_infos[attribute_idx] = (
-                    attribute_name,
-                    child_dgh_node.value,
-                )
-                new_specialization_node = SpecializationNode(
-                    new_dgh_node_attribute_infos[:], parent=specialization_node
-                )
-                new_specialization_nodes.append(new_specialization_node)
-
-            if new_specialization_nodes and all(
-                [node.num_records >= k for node in new_specialization_nodes]
-            ):
-                valid_splits.append(new_specialization_nodes)
-                split_cost_diffs.append(
-                    specialization_node.LM_cost
-                    - calculate_LM_cost_of_split(new_specialization_nodes)
-                )
+    if best_split is None:
+        return None
 
-        if not valid_splits:
-            new_specialization_tree_leaf_nodes.append(specialization_node)
-            continue
+    return [(node.dgh_node_attribute_infos, node.record_indices) for node in best_split]
 
-        best_split_index = max(
-            range(len(split_cost_diffs)), key=lambda idx: split_cost_diffs[idx]
-        )
-        best_split = valid_splits[best_split_index]
 
-        for best_split_leaf in best_split:
-            new_specialization_tree_leaf_nodes.append(best_split_leaf)
+def specialize(specialization_leaf_nodes, k, num_workers=1):
+    """
+    Specialize the given leaves until none has a valid split. A leaf's best split
+    only depends on its own records, so a leaf without one is final and is never
+    evaluated again.
 
-    else:
-        for node1, node2 in zip(
-            specialization_leaf_nodes, new_specialization_tree_leaf_nodes
-        ):
-            if node1 == node2:
-                continue
-            else:
-                break
+    With more than one worker, the leaves waiting in the worklist are scored in a
+    process pool. The quasi-identifier columns are placed in shared memory once
+    and only the leaves' record indices are sent to the workers.
+    """
+    if num_workers > 1:
+        return _specialize_in_parallel(specialization_leaf_nodes, k, num_workers)
+
+    worklist = list(specialization_leaf_nodes)
+    final_leaf_nodes = []
+
+    while worklist:
+        specialization_node = worklist.pop()
+        best_split = find_best_split(specialization_node, k)
+
+        if best_split is None:
+            final_leaf_nodes.append(specialization_node)
         else:
-            return specialization_leaf_nodes
+            worklist.extend(reversed(best_split))
+
+    return final_leaf_nodes
+
+
+def _specialize_in_parallel(specialization_leaf_nodes, k, num_workers):
+    worklist = list(specialization_leaf_nodes)
+    final_leaf_nodes = []
+
+    if not worklist:
+        return final_leaf_nodes
 
-        return specialize(new_specialization_tree_leaf_nodes, DGHs, k)
+    context = worklist[0].context
+    qi_attributes = context.raw_dataset.qi_attributes
+    qi_columns = np.stack(
+        [context.raw_dataset.columns[attribute] for attribute in qi_attributes]
+    ).astype(np.int32)
+
+    shared_memory = SharedMemory(create=True, size=qi_columns.nbytes)
+
+    try:
+        shared_qi_columns = np.ndarray(
+            qi_columns.shape, dtype=np.int32, buffer=shared_memory.buf
+        )
+        shared_qi_columns[:] = qi_columns
+
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_specialization_worker,
+            initargs=(
+                context.DGHs,
+                qi_attributes,
+                shared_memory.name,
+                qi_columns.shape,
+            ),
+        ) as executor:
+            while worklist:
+                tasks = [
+                    (node.dgh_node_attribute_infos, node.record_indices, k)
+                    for node in worklist
+                ]
+                best_splits = executor.map(
+                    _find_best_split_in_worker,
+                    tasks,
+                    chunksize=max(1, len(tasks) // (4 * num_workers)),
+                )
+                next_worklist = []
+
+                for specialization_node, best_split in zip(worklist, best_splits):
+                    if best_split is None:
+                        final_leaf_nodes.append(specialization_node)
+                        continue
+
+                    for dgh_node_attribute_infos, record_indices in best_split:
+                        next_worklist.append(
+                            SpecializationNode(
+                                context,
+                                dgh_node_attribute_infos,
+                                parent=specialization_node,
+                                record_indices=record_indices,
+                            )
+                        )
+
+                worklist = next_worklist
+
+        del shared_qi_columns
+    finally:
+        shared_memory.close()
+        shared_memory.unlink()
+
+    return final_leaf_nodes
@@ -0,0 +1,162 @@
+import csv
+from itertools import islice
+
+from encoding import EncodedDataset
+
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def read_encoded_chunks(
+    dataset_file: str,
+    DGHs: dict,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    min_chunk_size=1,
+    qi_only=False,
+):
+    """Read a csv file as a sequence of encoded chunks of chunk_size rows. A short
+    last chunk with fewer than min_chunk_size rows is appended to the one before
+    it, so at most two chunks of rows are held at once. See
+    EncodedDataset.from_rows for qi_only.
+
+    Yields:
+        EncodedDataset: the next chunk of rows.
+    """
+    with open(dataset_file) as f:
+        reader = csv.reader(f)
+        field_names = next(reader)
+
+        rows = list(islice(reader, chunk_size))
+
+        while rows:
+            next_rows = list(islice(reader, chunk_size))
+
+            if len(next_rows) < min_chunk_size:
+                rows.extend(next_rows)
+                next_rows = []
+
+            yield EncodedDataset.from_rows(field_names, rows, DGHs, qi_only)
+            rows = next_rows
+
+
+def write_encoded_chunks(chunks, dataset_file: str) -> bool:
+    """Write encoded chunks to a csv file as they are produced.
+
+    Args:
+        chunks: an iterable of EncodedDataset with the same field names.
+        dataset_file: str, the path to the csv file
+
+    Returns:
+        bool: True if succeeds.
+    """
+    num_rows = 0
+
+    with open(dataset_file, "w", newline="") as output_file:
+        writer = csv.writer(output_file)
+
+        for chunk in chunks:
+            if num_rows == 0:
+                writer.writerow(chunk.field_names)
+
+            writer.writerows(chunk.rows())
+            num_rows += len(chunk)
+
+    assert num_rows > 0, "The anonymized dataset is empty."
+    return True
+
+
+def apply_generalizations(
+    raw_dataset_file: str,
+    anonymized_dataset: EncodedDataset,
+    output_file: str,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    append=False,
+) -> bool:
+    """Stream the raw csv file to output_file, replacing each quasi-identifier
+    value with its generalization from anonymized_dataset, which only needs to
+    hold the encoded quasi-identifier columns. With append, the rows are added
+    to the end of an existing output_file, with their columns reordered to match
+    its header.
+
+    Raises:
+        ValueError: with append, if the raw file's columns are not those of
+            output_file. Nothing is written then.
+
+    Returns:
+        bool: True if succeeds.
+    """
+    assert len(anonymized_dataset) > 0, "The anonymized dataset is empty."
+
+    with open(raw_dataset_file) as f:
+        field_names = next(csv.reader(f))
+
+    column_order = None
+
+    if append:
+        with open(output_file) as f:
+            output_field_names = next(csv.reader(f))
+
+        if sorted(output_field_names) != sorted(field_names):
+            raise ValueError(
+                f"The columns of {raw_dataset_file} do not match those of "
+                f"{output_file}."
+            )
+        if output_field_names != field_names:
+            column_order = [field_names.index(name) for name in output_field_names]
+
+    with open(raw_dataset_file) as f, open(
+        output_file, "a" if append else "w", newline=""
+    ) as output:
+        reader = csv.reader(f)
+        writer = csv.writer(output)
+
+        next(reader)
+        if not append:
+            writer.writerow(field_names)
+
+        qi_positions = [
+            (position, attribute)
+            for position, attribute in enumerate(field_names)
+            if attribute in anonymized_dataset.columns
+        ]
+        DGHs = anonymized_dataset.DGHs
+
+        start = 0
+
+        while True:
+            rows = list(islice(reader, chunk_size))
+
+            if not rows:
+                break
+
+            end = start + len(rows)
+
+            for position, attribute in qi_positions:
+                values = DGHs[attribute].node_values(
+                    anonymized_dataset.columns[attribute][start:end]
+                )
+
+                for row, value in zip(rows, values):
+                    row[position] = value
+
+            if column_order is not None:
+                rows = [[row[position] for position in column_order] for row in rows]
+
+            writer.writerows(rows)
+            start = end
+
+    assert start == len(anonymized_dataset)
+    return True
+
+
+def encoded_chunks(dataset, DGHs: dict, chunk_size=DEFAULT_CHUNK_SIZE, qi_only=False):
+    """Chunks of chunk_size rows from either a csv file path or an already loaded
+    EncodedDataset, so callers can use an in-memory result when there is one.
+
+    Yields:
+        EncodedDataset: the next chunk of rows.
+    """
+    if isinstance(dataset, EncodedDataset):
+        for start in range(0, len(dataset), chunk_size):
+            yield dataset.take(slice(start, start + chunk_size))
+    else:
+        yield from read_encoded_chunks(dataset, DGHs, chunk_size, qi_only=qi_only)
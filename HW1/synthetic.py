@@ -0,0 +1,99 @@
+import argparse
+import csv
+
+import numpy as np
+
+from dgh_cache import load_DGHs
+from streaming import DEFAULT_CHUNK_SIZE
+
+INCOME_VALUES = ["<=50K", ">50K"]
+
+
+def leaf_distribution(dgh_info, skew: float):
+    """Leaf values of a DGH and Zipf-like sampling probabilities for them: the
+    leaf of rank r is drawn with probability proportional to 1 / r ** skew, so a
+    skew of 0 is uniform. Ranks follow a fixed shuffle of the leaves rather than
+    DGH order, so skew does not favour a single subtree.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: the leaf values and their probabilities.
+    """
+    leaf_values = dgh_info.node_values(dgh_info.leaf_node_ids())
+    np.random.default_rng(len(leaf_values)).shuffle(leaf_values)
+
+    weights = 1 / np.arange(1, len(leaf_values) + 1) ** skew
+    return leaf_values, weights / weights.sum()
+
+
+def generate_dataset(
+    DGHs: dict,
+    num_records: int,
+    output_file: str,
+    skew: float = 1.0,
+    seed: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> bool:
+    """Write a synthetic dataset whose quasi-identifiers are sampled independently
+    from the DGH leaves, followed by an income column. Rows are generated and
+    written chunk_size at a time, so num_records is not bounded by memory.
+
+    Args:
+        DGHs (dict): the loaded DGHs.
+        num_records (int): number of rows to write.
+        output_file (str): the path to the output csv file.
+        skew (float): see leaf_distribution.
+        seed (int): random seed; the same arguments produce the same file.
+        chunk_size (int): number of rows generated at a time.
+
+    Returns:
+        bool: True if succeeds.
+    """
+    rng = np.random.default_rng(seed)
+    attributes = sorted(DGHs)
+    distributions = [
+        leaf_distribution(DGHs[attribute], skew) for attribute in attributes
+    ]
+    income_values = np.array(INCOME_VALUES, dtype=object)
+
+    with open(output_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(attributes + ["income"])
+
+        for start in range(0, num_records, chunk_size):
+            num_chunk_records = min(chunk_size, num_records - start)
+            columns = [
+                leaf_values[rng.choice(len(leaf_values), num_chunk_records, p=p)]
+                for leaf_values, p in distributions
+            ]
+            columns.append(income_values[rng.integers(0, 2, num_chunk_records)])
+
+            writer.writerows(zip(*columns))
+
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic dataset from the leaves of a set of DGHs."
+    )
+    parser.add_argument("dgh_path", metavar="DGH-folder")
+    parser.add_argument("output_file", metavar="output.csv")
+    parser.add_argument("num_records", type=int)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate_dataset(
+        load_DGHs(args.dgh_path),
+        args.num_records,
+        args.output_file,
+        args.skew,
+        args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
+
+# Sample usage:
+# python3 synthetic.py DGHs/ synthetic-1M.csv 1000000 --skew 1.5
@@ -11,20 +11,38 @@ def calculate_LM_cost_of_split(specialization_split):
     return sum([node.LM_cost for node in specialization_split])
 
 
-def calc_dist_between_records(record1, record2, DGHs):
-    raw_records = [record1, record2]
-    anonymized_records = [dict(record1), dict(record2)]
+def calculate_LM_weights(DGHs):
+    """
+    Integer per-record LM cost numerators over a common denominator, so node costs
+    can be computed exactly as fractions. A value's numerator is its descendant
+    leaf count minus one times its attribute's multiplier, and is computed when
+    the value is looked up, so no DGH has to list all of its nodes.
 
-    total_MD_cost = 0
+    Returns:
+        a map from attribute to its numerator multiplier, and the denominator.
+    """
+    total_num_leaves_product = 1
 
-    calculate_equivalence_class(DGHs, anonymized_records)
+    for dgh_info in DGHs.values():
+        total_num_leaves_product *= dgh_info.total_num_leaves
+
+    weight_multipliers = {
+        attribute: total_num_leaves_product // dgh_info.total_num_leaves
+        for attribute, dgh_info in DGHs.items()
+    }
+
+    return weight_multipliers, total_num_leaves_product * len(DGHs)
 
-    for attribute, dgh_info in DGHs.items():
-        for idx in range(len(raw_records)):
-            raw_record, anonymized_record = raw_records[idx], anonymized_records[idx]
 
-            total_MD_cost += dgh_info.level_dist_between_values(
-                raw_record[attribute], anonymized_record[attribute]
-            )
+def calc_dist_between_records(record1, record2, DGHs):
+    total_MD_cost = 0
+
+    for attribute, dgh_info in DGHs.items():
+        total_MD_cost += int(
+            dgh_info.distance_table[
+                dgh_info.value_to_node_id_map[record1[attribute]],
+                dgh_info.value_to_node_id_map[record2[attribute]],
+            ]
+        )
 
     return total_MD_cost
@@ -0,0 +1,120 @@
+from collections import Counter
+
+import numpy as np
+
+from encoding import qi_tuple_keys, qi_tuple_node_ids
+from streaming import DEFAULT_CHUNK_SIZE, encoded_chunks
+
+
+class KAnonymityReport:
+    """
+    Equivalence class sizes of an anonymized dataset checked against k. Violating
+    classes are given as (quasi-identifier values, class size) pairs.
+    """
+
+    def __init__(self, k, num_records, class_sizes, violating_classes):
+        self.k = k
+        self.num_records = num_records
+        self.class_sizes = class_sizes
+        self.violating_classes = violating_classes
+
+    @property
+    def is_k_anonymous(self):
+        return not self.violating_classes
+
+    @property
+    def num_equivalence_classes(self):
+        return len(self.class_sizes)
+
+    @property
+    def min_class_size(self):
+        return min(self.class_sizes.values(), default=0)
+
+    @property
+    def mean_class_size(self):
+        if not self.class_sizes:
+            return 0
+
+        return self.num_records / self.num_equivalence_classes
+
+    @property
+    def size_distribution(self):
+        """
+        Number of equivalence classes per power-of-two class size range, keyed by
+        the (smallest, largest) size of the range.
+        """
+        distribution = Counter(
+            1 << (class_size.bit_length() - 1)
+            for class_size in self.class_sizes.values()
+        )
+        return {(low, 2 * low - 1): distribution[low] for low in sorted(distribution)}
+
+    def format(self, max_violations=10):
+        status = "passed" if self.is_k_anonymous else "FAILED"
+        lines = [
+            f"{self.k}-anonymity check: {status}",
+            f"\tEquivalence classes: {self.num_equivalence_classes}",
+            f"\tClass size min/mean: {self.min_class_size}"
+            f" / {self.mean_class_size:.2f}",
+            "\tClass size distribution:",
+        ]
+
+        for (low, high), num_classes in self.size_distribution.items():
+            size_range = str(low) if low == high else f"{low}-{high}"
+            lines.append(f"\t\t{size_range}: {num_classes}")
+
+        if self.violating_classes:
+            lines.append(f"\tViolating classes: {len(self.violating_classes)}")
+
+            for values, class_size in self.violating_classes[:max_violations]:
+                lines.append(f"\t\t{class_size}: {', '.join(values)}")
+
+            if len(self.violating_classes) > max_violations:
+                lines.append("\t\t...")
+
+        return "\n".join(lines)
+
+
+def verify_k_anonymity(
+    anonymized_dataset, DGHs: dict, k: int, chunk_size=DEFAULT_CHUNK_SIZE
+) -> KAnonymityReport:
+    """Group an anonymized dataset by quasi-identifier tuple in a single pass and
+    check every equivalence class against k.
+
+    Args:
+        anonymized_dataset: the anonymized dataset, as a csv file path or an
+            EncodedDataset.
+        DGHs (dict): the loaded DGHs.
+        k (int): k-anonymity parameter.
+        chunk_size (int): number of rows read at a time.
+
+    Returns:
+        KAnonymityReport: the class sizes and violating classes.
+    """
+    class_sizes = Counter()
+    qi_attributes = []
+    num_records = 0
+
+    for chunk in encoded_chunks(anonymized_dataset, DGHs, chunk_size, qi_only=True):
+        qi_attributes = chunk.qi_attributes
+        keys, counts = np.unique(qi_tuple_keys(chunk), return_counts=True)
+        class_sizes.update(dict(zip(keys.tolist(), counts.tolist())))
+        num_records += len(chunk)
+
+    # Only the violating classes are decoded back to their node ids.
+    violating_classes = [
+        (
+            tuple(
+                DGHs[attribute].node_values(node_id)
+                for attribute, node_id in zip(
+                    qi_attributes, qi_tuple_node_ids(key, qi_attributes, DGHs)
+                )
+            ),
+            class_size,
+        )
+        for key, class_size in class_sizes.items()
+        if class_size < k
+    ]
+    violating_classes.sort(key=lambda violating_class: violating_class[1])
+
+    return KAnonymityReport(k, num_records, class_sizes, violating_classes)
@@ -1,3 +1,4 @@
+import os
 from collections import Counter
 
 import matplotlib.pyplot as plt
@@ -23,33 +24,188 @@ LABELS = [
     "bbs",
     "travel",
 ]
+CACHE_ARRAYS = ["offsets", "categories"]
+
+
+class SequenceDataset:
+    """
+    Click sequences in compressed sparse row form: row i is
+    categories[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, offsets, categories):
+        self.offsets = offsets
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            assert step == 1, "Only contiguous row ranges are supported."
+
+            offsets = self.offsets[start : max(start, stop) + 1]
+            return SequenceDataset(
+                offsets - offsets[0], self.categories[offsets[0] : offsets[-1]]
+            )
+
+        return self.categories[self.offsets[index] : self.offsets[index + 1]].tolist()
+
+    @classmethod
+    def from_rows(cls, rows):
+        offsets = np.r_[0, np.cumsum([len(row) for row in rows], dtype=np.int64)]
+        categories = np.fromiter(
+            (category_idx for row in rows for category_idx in row),
+            dtype=np.uint8,
+            count=offsets[-1],
+        )
+        return cls(offsets, categories)
+
+    def row_lengths(self):
+        return np.diff(self.offsets)
+
+    def positions(self):
+        """
+        Position of every visit within its row, aligned with categories.
+        """
+        return np.arange(len(self.categories)) - np.repeat(
+            self.offsets[:-1], self.row_lengths()
+        )
+
+
+def parse_sequences(text: bytes):
+    """
+    Parses lines of space-separated category numbers into a SequenceDataset in
+    a few vectorized passes over the raw bytes.
+    """
+    chars = np.frombuffer(text, dtype=np.uint8)
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    starts = np.flatnonzero(is_digit & ~np.r_[False, is_digit[:-1]])
+    ends = np.flatnonzero(is_digit & ~np.r_[is_digit[1:], False])
+
+    digits = chars.astype(np.int32) - ord("0")
+    lengths = ends - starts + 1
+    values = digits[ends]
+
+    for place in range(1, lengths.max(initial=1)):
+        has_place = lengths > place
+        values[has_place] += 10**place * digits[ends[has_place] - place]
+
+    assert values.max(initial=0) < len(LABELS), "Unknown category in the dataset."
+
+    line_ends = np.flatnonzero(chars == ord("\n"))
+    if len(chars) > 0 and chars[-1] != ord("\n"):
+        line_ends = np.r_[line_ends, len(chars)]
+
+    offsets = np.r_[0, np.searchsorted(starts, line_ends)].astype(np.int64)
+    return SequenceDataset(offsets, values.astype(np.uint8))
+
+
+def _cache_files(filename):
+    return [f"{filename}.{array_name}.npy" for array_name in CACHE_ARRAYS]
+
+
+def _read_cached_dataset(filename):
+    cache_files = _cache_files(filename)
+
+    if not all(
+        os.path.exists(cache_file)
+        and os.path.getmtime(cache_file) >= os.path.getmtime(filename)
+        for cache_file in cache_files
+    ):
+        return None
+
+    try:
+        return SequenceDataset(
+            *(np.load(cache_file, mmap_mode="r") for cache_file in cache_files)
+        )
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cached_dataset(filename, dataset):
+    for cache_file, array in zip(
+        _cache_files(filename), [dataset.offsets, dataset.categories]
+    ):
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+
+        try:
+            with open(temp_file, "wb") as f:
+                np.save(f, array)
+
+            os.replace(temp_file, cache_file)
+        except OSError:
+            # A read-only directory only means the next run parses again.
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
 
 
 def read_dataset(filename):
     """
-    Reads the dataset with given filename.
+    Reads the dataset with given filename. The parsed arrays are cached as .npy
+    files next to the dataset and memory-mapped by later runs, until the
+    dataset file changes.
 
     Args:
         filename (str): Path to the dataset file
     Returns:
-        Dataset rows as a list of lists.
+        Dataset rows as a SequenceDataset.
     """
 
-    result = []
-    with open(filename, "r") as f:
-        for _ in range(7):
-            next(f)
-        for line in f:
-            sequence = line.strip().split(" ")
-            result.append([int(i) for i in sequence])
-    return result
+    dataset = _read_cached_dataset(filename)
+
+    if dataset is None:
+        with open(filename, "rb") as f:
+            for _ in range(7):
+                next(f)
+            dataset = parse_sequences(f.read())
+
+        _write_cached_dataset(filename, dataset)
+
+    return dataset
 
 
 def get_counts(dataset):
+    if isinstance(dataset, SequenceDataset):
+        return np.bincount(dataset.categories, minlength=len(LABELS))[1:].tolist()
+
     counts = Counter(category_idx for row in dataset for category_idx in row)
     return [counts[category_idx] for category_idx in range(1, len(LABELS))]
 
 
+def get_prefix_histograms(dataset):
+    """
+    Counts of each category among the first n visits of every row, for every n
+    at once: a position by category count matrix, built in one pass over the
+    visits, then summed over positions.
+
+    Args:
+        dataset: The MSNBC dataset, as a list of lists or a SequenceDataset
+    Returns:
+        Array whose row n is get_counts(truncate(dataset, n)), for n up to the
+        longest row length; truncated_counts also handles larger n.
+    """
+    if not isinstance(dataset, SequenceDataset):
+        dataset = SequenceDataset.from_rows(dataset)
+
+    num_categories = len(LABELS) - 1
+    num_positions = int(dataset.row_lengths().max(initial=0))
+
+    position_counts = np.bincount(
+        dataset.positions() * num_categories + dataset.categories - 1,
+        minlength=num_positions * num_categories,
+    ).reshape(num_positions, num_categories)
+
+    return np.vstack(
+        [np.zeros((1, num_categories), dtype=np.int64), position_counts.cumsum(axis=0)]
+    )
+
+
+def truncated_counts(prefix_histograms, n: int):
+    return prefix_histograms[min(n, len(prefix_histograms) - 1)].tolist()
+
+
 def draw_histogram(counts):
     fig, ax = plt.subplots()
     category_indices = list(range(1, len(LABELS)))
@@ -111,15 +267,19 @@ def truncate(dataset: list, n: int):
     Truncates dataset according to truncation parameter n.
 
     Args:
-        dataset: original dataset
+        dataset: original dataset, as a list of lists or a SequenceDataset
         n (int): truncation parameter
     Returns:
         truncated_dataset: truncated version of original dataset
     """
+    if isinstance(dataset, SequenceDataset):
+        offsets = np.r_[0, np.cumsum(np.minimum(dataset.row_lengths(), n))]
+        return SequenceDataset(offsets, dataset.categories[dataset.positions() < n])
+
     return [row[:n] for row in dataset]
 
 
-def get_dp_histogram(dataset: list, n: int, epsilon: float):
+def get_dp_histogram(dataset: list, n: int, epsilon: float, prefix_histograms=None):
     """
     Truncates dataset with parameter n and calculates differentially private histogram.
 
@@ -127,13 +287,19 @@ def get_dp_histogram(dataset: list, n: int, epsilon: float):
         dataset (list of lists): The MSNBC dataset
         n (int): Truncation parameter
         epsilon (float): Privacy parameter
+        prefix_histograms: get_prefix_histograms(dataset), to read the truncated
+            counts from instead of truncating the dataset
     Returns:
         Differentially private histogram as a list
     """
 
     sensitivity = n
-    truncated_histogram = truncate(dataset, n)
-    real_answers = get_counts(truncated_histogram)
+
+    if prefix_histograms is None:
+        truncated_histogram = truncate(dataset, n)
+        real_answers = get_counts(truncated_histogram)
+    else:
+        real_answers = truncated_counts(prefix_histograms, n)
 
     return add_laplace_noise(real_answers, sensitivity, epsilon)
 
@@ -167,13 +333,14 @@ def n_experiment(dataset, n_values: list, epsilon: float):
     1653.5 is the error when n = 6, and so forth.
     """
     errors = []
-    actual_hist = get_counts(dataset)
+    prefix_histograms = get_prefix_histograms(dataset)
+    actual_hist = prefix_histograms[-1].tolist()
 
     for n in n_values:
         run_errors = []
 
         for _ in range(30):
-            noisy_hist = get_dp_histogram(dataset, n, epsilon)
+            noisy_hist = get_dp_histogram(dataset, n, epsilon, prefix_histograms)
             error = calculate_average_error(actual_hist, noisy_hist)
 
             run_errors.append(error)
@@ -191,13 +358,14 @@ def epsilon_experiment(dataset, n: int, eps_values: list):
     1234.5 is the error when eps = 0.001, and so forth.
     """
     errors = []
-    actual_hist = get_counts(dataset)
+    prefix_histograms = get_prefix_histograms(dataset)
+    actual_hist = prefix_histograms[-1].tolist()
 
     for epsilon in eps_values:
         run_errors = []
 
         for _ in range(30):
-            noisy_hist = get_dp_histogram(dataset, n, epsilon)
+            noisy_hist = get_dp_histogram(dataset, n, epsilon, prefix_histograms)
             error = calculate_average_error(actual_hist, noisy_hist)
 
             run_errors.append(error)